@@ -0,0 +1,4 @@
+# src/app/__init__.py
+from .runner import run
+
+__all__ = ["run"]
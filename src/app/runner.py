@@ -0,0 +1,520 @@
+"""
+Orquestación de NOVALYTICS-BOT:
+- Login y navegación a 'Iniciar análisis' (una sola sesión reutilizada)
+- Monitor de carpeta (Watchdog, en cola)
+- Subidas en paralelo opcionales (pool de procesos, una sesión por worker)
+- Keepalive periódico para evitar expiración de sesión
+Cada variante se elige en tiempo de ejecución con flags de settings:
+enable_keepalive, force_polling, reuse_browser, max_parallel_uploads, async_uploads
+(este último usa src/app/runner_async.py).
+"""
+
+import os
+import sys
+import signal
+import logging
+import time
+import threading
+import multiprocessing.util
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack, suppress
+from queue import Queue
+from pathlib import Path
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.core import settings
+from src.robot.auth import demo_login, login_context, shutdown_browser
+from src.robot.browser_control import get_browser_pool
+from src.robot.analisis import perform_upload
+from src.event.file_monitor import FileMonitor, archive_file
+from src.event.processed_registry import ProcessedRegistry
+
+logger = logging.getLogger(__name__)
+
+# Marca de tiempo epoch (time.time()) en lugar de %(asctime)s: sin strftime/localtime por registro
+LOG_FORMAT = '%(created).3f %(levelname)s %(message)s'
+
+
+def setup_logging() -> QueueListener:
+    """
+    Logging global: los hilos solo encolan registros y la escritura a stderr
+    la hace el QueueListener devuelto (hay que arrancarlo/detenerlo).
+    """
+    log_queue: Queue = Queue(-1)
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    enqueue = QueueHandler(log_queue)
+    enqueue.setFormatter(logging.Formatter('%(message)s'))  # el formato final lo aplica stream
+
+    logging.basicConfig(
+        level=settings.log_level_int,
+        handlers=[enqueue],
+        force=True,
+    )
+    return QueueListener(log_queue, stream, respect_handler_level=True)
+
+
+# ============================================================
+# FUNCIONES PRINCIPALES
+# ============================================================
+
+# Elemento que aparece cuando el backend reporta el estado del análisis
+SEL_ANALISIS_RESULT = "h5.mb-2"
+
+# Marcador que el hilo de keepalive deja en la cola para pedir un ping
+KEEPALIVE = object()
+
+# Centinela que el handler de CTRL+C deja en la cola para despertar al consumidor
+STOP = None
+
+
+def build_http_session(context) -> requests.Session:
+    """
+    Sesión HTTP con una sola conexión keep-alive, con las cookies del contexto
+    de Playwright. Se usa para el ping de keepalive sin pasar por el navegador.
+    """
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+    http.mount("http://", adapter)
+    http.mount("https://", adapter)
+    http.headers["User-Agent"] = settings.browser_user_agent
+    for c in context.cookies():
+        http.cookies.set(c["name"], c["value"], domain=c.get("domain", ""), path=c.get("path", "/"))
+    return http
+
+
+def keep_session_alive(page, http: requests.Session, context):
+    """
+    Envía un 'ping' ligero para renovar cookies/sesión.
+    Se ejecuta en el hilo consumidor (la API sync de Playwright no es thread-safe).
+    """
+    try:
+        if not page:
+            return
+        # 1) HEAD al backend por la conexión keep-alive ya abierta
+        resp = http.head(settings.home_url or settings.base_url, timeout=5, allow_redirects=False)
+        # 2) Microactividad (solo si el backend la exige): un único evento sintético
+        if settings.keepalive_mouse_activity:
+            page.dispatch_event("body", "mousemove", {"clientX": 1, "clientY": 1})
+        # 3) Cookies renovadas → de vuelta al navegador
+        if resp.cookies:
+            context.add_cookies([
+                {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path or "/"}
+                for c in resp.cookies
+            ])
+        logger.debug("💓 keepalive enviado")
+    except Exception as e:
+        logger.warning("⚠️ keepalive falló: %s", e)
+
+
+def start_keepalive_ticker(q: Queue, interval: float, stop_event: threading.Event,
+                           queued: threading.Event) -> threading.Thread:
+    """
+    Hilo que deja KEEPALIVE en la cola cada `interval` segundos exactos
+    (deadlines con time.monotonic, sin deriva). Sale en cuanto se activa stop_event.
+    `queued` evita acumular varios KEEPALIVE mientras el consumidor está ocupado.
+    """
+    def _tick():
+        deadline = time.monotonic() + interval
+        while not stop_event.wait(timeout=max(0.0, deadline - time.monotonic())):
+            if not queued.is_set():
+                queued.set()
+                q.put(KEEPALIVE)
+            deadline += interval
+
+    t = threading.Thread(target=_tick, name="keepalive", daemon=True)
+    t.start()
+    return t
+
+
+def install_stop_handler(q: Queue, stop_event: threading.Event) -> Callable[[], None]:
+    """
+    CTRL+C → activa stop_event y deja STOP en la cola, para que el consumidor
+    bloqueado en q.get() salga al instante (en Windows un get() bloqueante no
+    ve el KeyboardInterrupt). Un segundo CTRL+C vuelve a lanzar KeyboardInterrupt.
+    Devuelve una función que restaura el handler previo.
+    """
+    previous = signal.getsignal(signal.SIGINT)
+
+    def _notify():
+        logger.info("⏹️ Interrupción manual detectada. Cerrando...")
+        q.put(STOP)
+
+    def _handler(signum, frame):
+        stop_event.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        # put/log desde otro hilo: el principal podría estar dentro del lock de la cola
+        threading.Thread(target=_notify, name="stop", daemon=True).start()
+
+    signal.signal(signal.SIGINT, _handler)
+    return lambda: signal.signal(signal.SIGINT, previous)
+
+
+def is_session_valid(page) -> bool:
+    """
+    Verificación ligera de la sesión: página abierta y fuera de /login.
+    No navega ni consulta el DOM, solo inspecciona el estado local de la página.
+    """
+    try:
+        if page is None or page.is_closed():
+            return False
+        return "/login" not in (page.url or "").lower()
+    except Exception:
+        return False
+
+
+def _quiet(fn: Callable, *args) -> None:
+    """Ejecuta un paso de cierre ignorando sus errores (teardown)."""
+    with suppress(Exception):
+        fn(*args)
+
+
+def close_session(pw, browser, context) -> None:
+    """Cierre seguro de Playwright (context → browser → pw)."""
+    with ExitStack() as stack:  # LIFO: se registra en orden inverso
+        if pw:
+            stack.callback(_quiet, pw.stop)
+        if browser:
+            stack.callback(_quiet, browser.close)
+        if context:
+            stack.callback(_quiet, context.close)
+
+
+def post_process(fpath: Path) -> None:
+    """Post-proceso tras la subida: mover a procesados o eliminar, según settings."""
+    try:
+        if settings.move_processed_files:
+            archive_file(fpath)
+        elif settings.delete_after_processing:
+            try:
+                os.unlink(fpath)
+            except FileNotFoundError:
+                pass
+            logger.info("🗑️ Archivo eliminado: %s", fpath.name)
+    except Exception as e:
+        logger.warning("⚠️ Falló post-proceso del archivo: %s", e)
+
+
+def process_file(page, fpath: Path, on_uploaded: Optional[Callable[[], None]] = None) -> bool:
+    """
+    Sube el archivo detectado usando la sesión ya abierta y hace el post-proceso.
+    No abre ni cierra el navegador: la sesión la gestiona el consumidor.
+    `on_uploaded` se llama justo tras la subida, antes de archivar el archivo.
+    Devuelve True si la subida se completó.
+    """
+    logger.info("📂 Iniciando flujo de análisis para %s", fpath.name)
+
+    try:
+        # Subir archivo y esperar resultado
+        perform_upload(page, fpath)
+        logger.info("📤 Archivo subido, esperando estado del análisis...")
+        if on_uploaded:
+            on_uploaded()
+
+        try:
+            page.wait_for_selector(SEL_ANALISIS_RESULT, state="attached", timeout=settings.analysis_result_timeout_ms)
+            logger.info("✅ Estado del análisis detectado: proceso completado.")
+        except Exception as e:
+            logger.warning("⚠️ No se detectó el estado del análisis: %s", e)
+
+        post_process(fpath)
+        return True
+
+    except Exception as e:
+        logger.error("❌ Falló el flujo con %s: %s", fpath.name, e, exc_info=True)
+        return False
+
+
+def pending_key(processed: ProcessedRegistry, fpath: Path, st: Optional[os.stat_result] = None) -> Optional[str]:
+    """
+    Clave de idempotencia del archivo, o None si hay que omitirlo
+    (ya no existe, quedó vacío o ya se subió sin cambios).
+    Hace un único stat() justo antes de subir: el archivo pudo borrarse o
+    reemplazarse mientras esperaba en la cola. `st` es el stat del detector.
+    """
+    try:
+        cur = fpath.stat()
+    except FileNotFoundError:
+        logger.warning("⚠️ El archivo ya no existe, se omite: %s", fpath.name)
+        return None
+    if cur.st_size == 0:
+        logger.warning("⚠️ El archivo está vacío, se omite: %s", fpath.name)
+        return None
+    if st is not None and (cur.st_mtime_ns, cur.st_size) != (st.st_mtime_ns, st.st_size):
+        logger.info("🔄 %s cambió desde su detección, se usa su estado actual", fpath.name)
+    key = ProcessedRegistry.key_for(fpath, cur)
+    if key in processed:
+        logger.info("⏭️ Ya procesado (sin cambios), se omite: %s", fpath.name)
+        return None
+    return key
+
+
+# ============================================================
+# CONSUMIDORES DE LA COLA
+# ============================================================
+
+def run_single(q: Queue, processed: ProcessedRegistry, stop_event: threading.Event):
+    """
+    Consumidor secuencial: una sola sesión de Playwright en este proceso,
+    reutilizada para todos los archivos.
+    """
+    pw = browser = context = page = None
+    http = None
+    stop_keepalive = threading.Event()
+    keepalive_queued = threading.Event()
+    with ExitStack() as stack:
+        # Cierre en orden inverso: keepalive → HTTP → navegador
+        stack.callback(logger.info, "✅ Navegador cerrado.")
+        stack.callback(lambda: close_session(pw, browser, context))
+        stack.callback(lambda: http and _quiet(http.close))
+        stack.callback(stop_keepalive.set)
+
+        # Sesión única: se abre una vez y se reutiliza para todos los archivos
+        pw, browser, context, page = demo_login()
+        logger.info("✅ Sesión lista en 'Iniciar análisis'.")
+
+        # Keepalive (opcional): el hilo solo encola, el ping corre aquí
+        if settings.enable_keepalive:
+            http = build_http_session(context)
+            start_keepalive_ticker(q, settings.keepalive_interval, stop_keepalive, keepalive_queued)
+
+        while not stop_event.is_set():
+            item = q.get()
+            if item is STOP:
+                break
+
+            if item is KEEPALIVE:
+                keepalive_queued.clear()
+                keep_session_alive(page, http, context)
+                continue
+
+            fpath, st = item
+            key = pending_key(processed, fpath, st)
+            if key is None:
+                continue
+
+            if not is_session_valid(page):
+                logger.warning("⚠️ Sesión inválida o expirada. Reabriendo login...")
+                # Con página abierta la sesión caducó de verdad: no sirve el storage_state guardado
+                expired = page is not None
+                try:
+                    if browser and browser.is_connected():
+                        # Navegador vivo: solo se cambia el contexto (sin relanzar Chromium)
+                        if context:
+                            _quiet(context.close)
+                        context = page = None
+                        context, page = login_context(browser, force=expired or None)
+                    else:
+                        close_session(pw, browser, context)
+                        pw = browser = context = page = None
+                        pw, browser, context, page = demo_login(force=expired or None)
+                    if http:
+                        http.close()
+                        http = build_http_session(context)
+                except Exception as e:
+                    logger.error("❌ No se pudo reabrir la sesión, se omite %s: %s", fpath.name, e, exc_info=True)
+                    continue
+
+            process_file(page, fpath, on_uploaded=lambda: processed.add(key))
+
+            if not settings.reuse_browser:
+                # Modo sin reutilización: contexto (cookies/estado) nuevo para el siguiente
+                # archivo; el navegador se mantiene y el login se rehace al llegar
+                _quiet(context.close)
+                context = page = None
+
+
+# ---- Workers en procesos separados (la API sync de Playwright no es thread-safe) ----
+_worker_session = None  # (pw, browser, context, page) propio de cada proceso worker
+
+
+def _worker_close():
+    global _worker_session
+    if _worker_session:
+        pw, browser, context, _ = _worker_session
+        close_session(pw, browser, context)
+        _worker_session = None
+    shutdown_browser()
+
+
+def _worker_init():
+    """Initializer del pool: cada proceso abre su propia sesión una sola vez."""
+    global _worker_session
+    # CTRL+C lo maneja el proceso principal, que espera a las subidas en curso
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # El QueueListener vive en el proceso principal: el worker escribe directo.
+    # Nivel desde settings: con spawn (Windows) el worker no hereda el del padre
+    logging.basicConfig(level=settings.log_level_int, format=LOG_FORMAT, force=True)
+    _worker_session = demo_login()
+    multiprocessing.util.Finalize(None, _worker_close, exitpriority=10)
+    logger.info("✅ Worker %s: sesión lista en 'Iniciar análisis'.", os.getpid())
+
+
+def _worker_task(fpath: Path) -> bool:
+    """Tarea del pool: valida la sesión del worker y procesa el archivo."""
+    global _worker_session
+    page = _worker_session[3] if _worker_session else None
+    if not is_session_valid(page):
+        logger.warning("⚠️ Worker %s: sesión inválida. Reabriendo login...", os.getpid())
+        pw, browser, context, _ = _worker_session or (None, None, None, None)
+        if browser and browser.is_connected():
+            # Navegador vivo: contexto nuevo sin relanzar Chromium
+            if context:
+                _quiet(context.close)
+            context, page = login_context(browser, force=True)
+            _worker_session = (pw, browser, context, page)
+        else:
+            _worker_close()
+            _worker_session = demo_login(force=True)
+            page = _worker_session[3]
+    return process_file(page, fpath)
+
+
+def run_parallel(q: Queue, workers: int, processed: ProcessedRegistry, stop_event: threading.Event):
+    """
+    Consumidor paralelo: reparte los archivos entre `workers` procesos,
+    cada uno con su propio navegador y sesión.
+    El registro de procesados vive en este proceso y se actualiza al terminar cada tarea.
+    """
+    logger.info("🧵 Subidas en paralelo con %s workers", workers)
+    pending: set[Future] = set()
+    # Claves con subida en curso: un duplicado en la cola no se envía otra vez
+    in_flight: set[str] = set()
+
+    def _done(fut: Future, key: str) -> None:
+        # Se marca procesado antes de liberar la clave: no queda hueco para un duplicado
+        if not fut.cancelled() and fut.exception() is None and fut.result():
+            processed.add(key)
+        in_flight.discard(key)
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init)
+    try:
+        while not stop_event.is_set():
+            item = q.get()
+            if item is STOP:
+                break
+            fpath, st = item
+            key = pending_key(processed, fpath, st)
+            if key is None:
+                continue
+            if key in in_flight:
+                logger.info("⏭️ Ya se está subiendo, se omite el duplicado: %s", fpath.name)
+                continue
+
+            in_flight.add(key)
+            try:
+                fut = executor.submit(_worker_task, fpath)
+            except Exception:
+                in_flight.discard(key)
+                raise
+            pending.add(fut)
+            fut.add_done_callback(pending.discard)
+            fut.add_done_callback(lambda f, key=key: _done(f, key))
+
+    finally:
+        for fut in list(pending):
+            fut.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("✅ Workers y navegadores cerrados.")
+
+
+# ============================================================
+# MAIN LOOP
+# ============================================================
+
+def run():
+    """Arranca el bot completo (bloqueante hasta CTRL+C)."""
+    log_listener = setup_logging()
+    log_listener.start()
+    try:
+        serve()
+    finally:
+        log_listener.stop()
+
+
+def _build_banner(s) -> str:
+    """Resumen de arranque en un solo bloque (una escritura al log)."""
+    return "\n".join([
+        f"   📦 App: {s.app_name} v{s.app_version}",
+        f"   🌍 Entorno: {s.environment}",
+        f"   🌐 Base URL: {s.base_url}",
+        f"   📁 Carpeta observada: {s.shared_folder}",
+        f"   🔗 Login URL: {s.login_url}",
+        f"   🔗 Análisis URL: {s.analisis_url}",
+    ])
+
+
+def serve():
+    settings.ensure_directories_exist()
+    logger.info("🚀 Iniciando NOVALYTICS-BOT\n%s", _build_banner(settings))
+
+    workers = settings.max_parallel_uploads
+    async_mode = settings.async_uploads
+    if async_mode:
+        # El hilo de watchdog publica directo en la asyncio.Queue del loop
+        from src.app import runner_async
+        loop, q, enqueue = runner_async.make_feed()
+    else:
+        q: Queue = Queue()  # (Path, stat_result) a subir o KEEPALIVE
+        enqueue = q.put
+
+    # Callback del monitor. FileHandler ya agrupa las ráfagas de eventos por ruta y
+    # solo entrega el archivo cuando dejó de cambiar (o se cerró tras escribirlo),
+    # así que aquí basta un stat para encolarlo con su estado.
+    def on_file_detected(p: Path):
+        if p.suffix.lower() not in settings.allowed_file_extensions:
+            logger.info("📄 Archivo ignorado (extensión no válida): %s", p.name)
+            return
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            return
+        if st.st_size == 0:
+            return
+        logger.info("📥 Archivo Excel detectado: %s", p.name)
+        enqueue((p, st))
+
+    # Iniciar monitor
+    mon = FileMonitor()
+    # use_polling=False → FileMonitor usa el Observer nativo (inotify/ReadDirectoryChangesW);
+    # en shares de red/UNC el propio monitor pasa a PollingObserver (needs_polling).
+    mon.use_polling = settings.force_polling
+    started = mon.start(on_file_detected)
+
+    if not started:
+        logger.error("❌ No se pudo iniciar el monitor de carpeta.")
+        return
+
+    logger.info("🚚 Automatización activa. Deja archivos Excel en la carpeta para subirlos.")
+    logger.info("⏸️ Presiona CTRL+C para terminar.")
+
+    processed = ProcessedRegistry(
+        settings.shared_folder / ".nlb_processed.db",
+        ttl_days=settings.idempotency_ttl_days,
+    )
+
+    with ExitStack() as stack:
+        # Cierre en orden inverso: monitor → registro → Chromium compartido
+        stack.callback(logger.info, "✅ NOVALYTICS-BOT finalizado correctamente.")
+        stack.callback(shutdown_browser)
+        stack.callback(_quiet, processed.close)
+        stack.callback(_quiet, mon.stop)
+        stop_event = threading.Event()
+        if not async_mode:
+            # El loop async maneja CTRL+C por su cuenta (cancela los uploaders)
+            stack.callback(install_stop_handler(q, stop_event))
+        try:
+            if async_mode:
+                runner_async.run(loop, q, workers, processed)
+            elif workers > 1:
+                run_parallel(q, workers, processed, stop_event)
+            else:
+                # Chromium (sesión + reserva) lanzado antes del primer login, en este hilo
+                get_browser_pool().warm()
+                run_single(q, processed, stop_event)
+        except KeyboardInterrupt:
+            logger.info("⏹️ Interrupción manual detectada. Cerrando...")
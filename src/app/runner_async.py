@@ -0,0 +1,176 @@
+"""
+Consumidor asíncrono de NOVALYTICS-BOT (settings.async_uploads):
+- Un solo navegador y un solo event loop (async_playwright)
+- max_parallel_uploads uploaders, cada uno con su propio contexto y página
+- La espera larga del resultado del análisis cede el loop a los demás uploaders
+El hilo de watchdog publica en la asyncio.Queue con loop.call_soon_threadsafe.
+"""
+
+import asyncio
+import logging
+from contextlib import suppress
+from pathlib import Path
+from typing import Callable, Optional, Set, Tuple
+
+from playwright.async_api import async_playwright
+
+from src.core import settings
+from src.robot.auth import login_context_async
+from src.robot.analisis_async import perform_upload_async
+from src.event.processed_registry import ProcessedRegistry
+from src.app.runner import SEL_ANALISIS_RESULT, is_session_valid, pending_key, post_process
+
+logger = logging.getLogger(__name__)
+
+
+def make_feed() -> Tuple[asyncio.AbstractEventLoop, asyncio.Queue, Callable]:
+    """
+    Crea el loop y la cola de archivos. Devuelve (loop, q, enqueue), donde
+    enqueue es seguro para llamarse desde el hilo del monitor.
+    """
+    loop = asyncio.new_event_loop()
+    q: asyncio.Queue = asyncio.Queue()
+
+    def enqueue(item) -> None:
+        with suppress(RuntimeError):  # loop ya cerrado durante el apagado
+            loop.call_soon_threadsafe(q.put_nowait, item)
+
+    return loop, q, enqueue
+
+
+async def keep_session_alive_async(page, context) -> None:
+    """Ping ligero con el APIRequestContext del contexto (comparte y renueva sus cookies)."""
+    try:
+        await context.request.head(settings.home_url or settings.base_url, timeout=5000, max_redirects=0)
+        if settings.keepalive_mouse_activity:
+            await page.dispatch_event("body", "mousemove", {"clientX": 1, "clientY": 1})
+        logger.debug("💓 keepalive enviado")
+    except Exception as e:
+        logger.warning("⚠️ keepalive falló: %s", e)
+
+
+async def process_file_async(page, fpath: Path, on_uploaded: Optional[Callable[[], None]] = None) -> bool:
+    """Equivalente async de runner.process_file (`on_uploaded` corre en un hilo, no en el loop)."""
+    logger.info("📂 Iniciando flujo de análisis para %s", fpath.name)
+    try:
+        await perform_upload_async(page, fpath)
+        logger.info("📤 Archivo subido, esperando estado del análisis...")
+        if on_uploaded:
+            # p.ej. ProcessedRegistry.add: escribe el shelve del share (SMB), fuera del loop
+            await asyncio.to_thread(on_uploaded)
+
+        try:
+            await page.wait_for_selector(SEL_ANALISIS_RESULT, state="attached", timeout=settings.analysis_result_timeout_ms)
+            logger.info("✅ Estado del análisis detectado: proceso completado.")
+        except Exception as e:
+            logger.warning("⚠️ No se detectó el estado del análisis: %s", e)
+
+        # mover/borrar en el share (SMB) no bloquea a los demás uploaders
+        await asyncio.to_thread(post_process, fpath)
+        return True
+
+    except Exception as e:
+        logger.error("❌ Falló el flujo con %s: %s", fpath.name, e, exc_info=True)
+        return False
+
+
+async def uploader(n: int, browser, q: asyncio.Queue, processed: ProcessedRegistry,
+                   login_lock: asyncio.Lock, in_flight: Set[str]) -> None:
+    """
+    Consume la cola con su propio contexto; reabre login si la sesión expira.
+    `in_flight` (compartido por todos los uploaders) guarda las claves con subida
+    en curso: un duplicado en la cola no se sube dos veces a la vez.
+    """
+    context = page = None
+    keepalive = settings.keepalive_interval if settings.enable_keepalive else None
+
+    async def _open() -> bool:
+        nonlocal context, page
+        if context:
+            with suppress(Exception):
+                await context.close()
+        context = page = None
+        try:
+            # Un login a la vez: todos escriben el mismo storage_state
+            async with login_lock:
+                context, page = await login_context_async(browser)
+            logger.info("✅ Uploader %s: sesión lista en 'Iniciar análisis'.", n)
+            return True
+        except Exception as e:
+            logger.error("❌ Uploader %s: no se pudo abrir la sesión: %s", n, e, exc_info=True)
+            return False
+
+    try:
+        await _open()
+        while True:
+            try:
+                fpath, st = await asyncio.wait_for(q.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                if context:
+                    await keep_session_alive_async(page, context)
+                continue
+
+            # stat en el share (SMB) fuera del loop
+            key = await asyncio.to_thread(pending_key, processed, fpath, st)
+            if key is None:
+                continue
+            # Comprobar y reservar sin await de por medio: atómico dentro del loop
+            if key in in_flight:
+                logger.info("⏭️ Ya se está subiendo, se omite el duplicado: %s", fpath.name)
+                continue
+            if key in processed:  # otro uploader lo terminó mientras se hacía el stat
+                continue
+            in_flight.add(key)
+            try:
+                if not is_session_valid(page):
+                    logger.warning("⚠️ Uploader %s: sesión inválida o expirada. Reabriendo login...", n)
+                    if not await _open():
+                        logger.warning("⚠️ Se omite %s", fpath.name)
+                        continue
+
+                await process_file_async(page, fpath, on_uploaded=lambda: processed.add(key))
+            finally:
+                in_flight.discard(key)
+
+            if not settings.reuse_browser:
+                # Contexto nuevo para el siguiente archivo (el navegador se mantiene)
+                await _open()
+    finally:
+        if context:
+            with suppress(Exception):
+                await context.close()
+
+
+async def run_async(q: asyncio.Queue, workers: int, processed: ProcessedRegistry) -> None:
+    logger.info("⚡ Subidas asíncronas con %s uploaders en un solo navegador", workers)
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=settings.browser_headless)
+        login_lock = asyncio.Lock()
+        in_flight: Set[str] = set()
+        tasks = [
+            asyncio.create_task(uploader(n, browser, q, processed, login_lock, in_flight), name=f"uploader-{n}")
+            for n in range(1, workers + 1)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            with suppress(Exception):
+                await browser.close()
+            logger.info("✅ Uploaders y navegador cerrados.")
+
+
+def run(loop: asyncio.AbstractEventLoop, q: asyncio.Queue, workers: int, processed: ProcessedRegistry) -> None:
+    """Ejecuta los uploaders en `loop` hasta CTRL+C (que se propaga tras cerrar el navegador)."""
+    task = loop.create_task(run_async(q, workers, processed))
+    try:
+        loop.run_until_complete(task)
+    except KeyboardInterrupt:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            loop.run_until_complete(task)
+        raise
+    finally:
+        loop.close()
@@ -1,5 +1,5 @@
 # src/core/__init__.py
-from .config_loader import config
-from .settings import settings
+from .config_loader import config, get_config_loader
+from .settings import settings, get_settings
 
-__all__ = ["config", "settings"]
+__all__ = ["config", "settings", "get_config_loader", "get_settings"]
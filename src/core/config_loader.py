@@ -3,50 +3,82 @@ Cargador inteligente de configuración para NOVALYTICS-BOT
 Combina variables de entorno (.env) con configuración JSON (config.json)
 """
 
-import json
+import math
 import os
+import re
 import logging
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
-from dotenv import load_dotenv
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Set
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Parser JSON: orjson (C/SIMD) → ujson → json de la stdlib, según lo instalado
+try:
+    import orjson as _json
+except ImportError:
+    try:
+        import ujson as _json
+    except ImportError:
+        import json as _json
+
+# El logging lo configura el punto de entrada (src/app/runner.py: setup_logging)
 logger = logging.getLogger(__name__)
 
+# Rutas fijas del proyecto, calculadas una sola vez al importar
+_ROOT = Path(__file__).resolve().parent.parent.parent
+_ENV_PATH = _ROOT / '.env'
+_CONFIG_PATH = _ROOT / 'config' / 'config.json'
+
 class ConfigLoader:
     """
     Cargador de configuración que unifica .env y config.json
     """
     
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(ConfigLoader, cls).__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+    # Caché a nivel de clase (sobrevive a reload): ruta -> (mtime_ns, tamaño, config procesado)
+    _cache: Dict[str, tuple] = {}
+    # {{VAR}} con espacios opcionales, compilado una sola vez
+    _PLACEHOLDER_RE = re.compile(r'\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}')
     
+    # Atributos que se crean en _setup(): su primer acceso dispara la carga
+    _LAZY_ATTRS = frozenset({'config', '_flat', '_env_cache'})
+
     def __init__(self):
-        if self._initialized:
-            return
-            
+        # Carga diferida: importar el módulo no lee .env ni config.json (ver __getattr__)
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        # Solo se invoca si el atributo aún no existe, es decir, antes de la primera carga
+        if name in self._LAZY_ATTRS:
+            try:
+                self._setup()
+            except Exception:
+                # Sin estado a medias: el próximo acceso vuelve a intentar (y a fallar)
+                for attr in self._LAZY_ATTRS:
+                    self.__dict__.pop(attr, None)
+                raise
+            return self.__dict__[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def _setup(self):
+        """Carga .env + config.json, resuelve variables y valida (también usado por reload)."""
         self.config: Dict[str, Any] = {}
+        # Variables ya resueltas y convertidas (una misma {{VAR}} puede repetirse)
+        self._env_cache: Dict[str, Any] = {}
+        # Variables {{VAR}} sin definir: se avisan juntas al terminar de procesar
+        self._missing_env: Set[str] = set()
         self._load_environment()
         self._load_config_file()
+        self._flat = self._flatten(self.config)
         self._validate_config()
-        
-        self._initialized = True
         logger.info("✅ ConfigLoader inicializado correctamente")
     
     def _load_environment(self):
         """Cargar variables de entorno desde .env"""
         try:
-            # Buscar .env en el directorio raíz del proyecto
-            env_path = Path(__file__).parent.parent.parent / '.env'
+            env_path = _ENV_PATH
             
             if env_path.exists():
-                load_dotenv(dotenv_path=env_path)
+                self._parse_env_file(env_path)
                 logger.info("✅ Variables de entorno cargadas desde .env")
             else:
                 logger.warning("⚠️  Archivo .env no encontrado. Usando variables de sistema.")
@@ -54,25 +86,55 @@ class ConfigLoader:
         except Exception as e:
             logger.error(f"❌ Error cargando variables de entorno: {e}")
     
+    @staticmethod
+    def _parse_env_file(env_path: Path) -> None:
+        """
+        Parser mínimo de .env (KEY=VALUE por línea). Como load_dotenv, no pisa
+        variables ya definidas en el entorno. Ignora vacías, '#' y 'export '.
+        """
+        for line in env_path.read_text(encoding='utf-8').splitlines():
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, _, value = line.partition('=')
+            key = key.strip()
+            if key.startswith('export '):
+                key = key[7:].strip()
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+                value = value[1:-1]
+            os.environ.setdefault(key, value)
+
     def _load_config_file(self):
         """Cargar y procesar archivo config.json"""
         try:
-            config_path = Path(__file__).parent.parent.parent / 'config' / 'config.json'
+            config_path = _CONFIG_PATH
             
-            if not config_path.exists():
+            try:
+                st = config_path.stat()
+            except FileNotFoundError:
                 raise FileNotFoundError(f"Archivo config.json no encontrado en: {config_path}")
-            
-            with open(config_path, 'r', encoding='utf-8') as f:
-                raw_config = json.load(f)
+
+            # Sin cambios en disco (mtime+tamaño) → se reutiliza el config ya procesado
+            cached = self._cache.get(str(config_path))
+            if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+                self.config = cached[2]
+                logger.info("✅ Configuración sin cambios (caché)")
+                return
+
+            raw_config = _json.loads(config_path.read_bytes())
             
             # Procesar y reemplazar variables de entorno
             self.config = self._process_config(raw_config)
+            if self._missing_env:
+                logger.warning("⚠️ Variables de entorno no definidas: %s", ", ".join(sorted(self._missing_env)))
+            self._cache[str(config_path)] = (st.st_mtime_ns, st.st_size, self.config)
             logger.info("✅ Configuración cargada desde config.json")
             
         except FileNotFoundError as e:
             logger.error(f"❌ {e}")
             raise
-        except json.JSONDecodeError as e:
+        except ValueError as e:  # JSONDecodeError de orjson/ujson/json hereda de ValueError
             logger.error(f"❌ Error de formato JSON en config.json: {e}")
             raise
         except Exception as e:
@@ -82,22 +144,50 @@ class ConfigLoader:
     def _process_config(self, config_obj: Any) -> Any:
         """
         Procesar objeto de configuración y reemplazar variables {{VARIABLE}}
-        
+
+        Recorre el árbol una sola vez con una pila (sin recursión), modificando
+        dicts/listas en sitio. Un string que es solo '{{VAR}}' conserva el tipo
+        convertido (bool/int/lista...); si el placeholder va dentro de un texto
+        ('{{BASE_URL}}/login') se sustituye como string.
+
         Args:
             config_obj: Objeto de configuración (dict, list, o str)
-            
+
         Returns:
             Objeto procesado con variables reemplazadas
         """
-        if isinstance(config_obj, dict):
-            return {key: self._process_config(value) for key, value in config_obj.items()}
-        elif isinstance(config_obj, list):
-            return [self._process_config(item) for item in config_obj]
-        elif isinstance(config_obj, str) and config_obj.startswith('{{') and config_obj.endswith('}}'):
-            return self._get_env_variable(config_obj[2:-2].strip())
-        else:
-            return config_obj
-    
+        if isinstance(config_obj, str):
+            return self._resolve_string(config_obj)
+
+        # Locales: evitan buscar atributos/métodos en cada nodo del bucle
+        resolve = self._resolve_string
+        stack = [config_obj]
+        push, pop = stack.append, stack.pop
+        while stack:
+            node = pop()
+            items = node.items() if type(node) is dict else enumerate(node)
+            for key, value in items:
+                if type(value) is str:
+                    if '{{' in value:
+                        node[key] = resolve(value)
+                elif isinstance(value, (dict, list)):
+                    push(value)
+        return config_obj
+
+    def _resolve_string(self, value: str) -> Any:
+        """Resolver los {{VAR}} de un string (valor tipado si es un placeholder completo)."""
+        if '{{' not in value:
+            return value
+        # Solo un string que empieza por '{{' puede ser un placeholder completo
+        full = self._PLACEHOLDER_RE.fullmatch(value) if value.startswith('{{') else None
+        if full:
+            return self._get_env_variable(full.group(1))
+        return self._PLACEHOLDER_RE.sub(self._placeholder_text, value)
+
+    def _placeholder_text(self, match: "re.Match") -> str:
+        resolved = self._get_env_variable(match.group(1))
+        return '' if resolved is None else str(resolved)
+
     def _get_env_variable(self, var_name: str, default: Any = None) -> Any:
         """
         Obtener variable de entorno y convertir tipos básicos
@@ -109,58 +199,87 @@ class ConfigLoader:
         Returns:
             Valor de la variable convertido al tipo apropiado
         """
-        value = os.getenv(var_name, default)
+        if default is None and var_name in self._env_cache:
+            return self._env_cache[var_name]
+
+        value = os.environ.get(var_name, default)
         
         if value is None:
-            logger.warning(f"⚠️ Variable de entorno {var_name} no definida")
-            return None
-        
-        # Conversión de tipos
-        if isinstance(value, str):
-            # Booleanos
-            if value.lower() in ('true', 'false'):
-                return value.lower() == 'true'
-            # Enteros
-            elif value.isdigit():
-                return int(value)
-            # Flotantes
-            elif self._is_float(value):
-                return float(value)
-            # Listas (separadas por comas)
-            elif ',' in value:
-                return [item.strip() for item in value.split(',')]
-        
+            self._missing_env.add(var_name)
+        elif isinstance(value, str):
+            value = self._coerce(value)
+
+        if default is None:
+            self._env_cache[var_name] = value
         return value
     
-    def _is_float(self, value: str) -> bool:
-        """Verificar si un string puede convertirse a float"""
+    @staticmethod
+    def _coerce(value: str) -> Any:
+        """
+        Conversión de tipos en una sola cadena de intentos: int → float → lista → bool.
+        Se ejecuta una vez por variable (resultado memoizado en _env_cache).
+        """
+        # Enteros (acepta signo, a diferencia de isdigit)
         try:
-            float(value)
-            return True
+            return int(value)
+        except ValueError:
+            pass
+        # Flotantes ('nan'/'inf' se dejan como texto)
+        try:
+            number = float(value)
+            if math.isfinite(number):
+                return number
         except ValueError:
+            pass
+        # Listas (separadas por comas)
+        if ',' in value:
+            return [item.strip() for item in value.split(',')]
+        # Booleanos
+        lowered = value.lower()
+        if lowered == 'true':
+            return True
+        if lowered == 'false':
             return False
+        return value
     
+    # Claves obligatorias (en orden, para el mensaje de error)
+    _REQUIRED_CONFIGS = (
+        'urls.base_url',
+        'paths.shared_folder',
+        'analisis.default_parametro',
+        'analisis.default_servicio',
+    )
+
     def _validate_config(self):
-        """Validar configuración requerida"""
-        required_configs = [
-            'urls.base_url',
-            'paths.shared_folder',
-            'analisis.default_parametro', 
-            'analisis.default_servicio'
-        ]
-        
-        missing = []
-        for config_path in required_configs:
-            if self.get(config_path) is None:
-                missing.append(config_path)
-        
+        """Validar configuración requerida (una búsqueda en el mapa plano por clave)"""
+        flat = self._flat
+        missing = [k for k in self._REQUIRED_CONFIGS if flat.get(k) is None]
+
         if missing:
             error_msg = f"❌ Configuración requerida faltante: {', '.join(missing)}"
             logger.error(error_msg)
             raise ValueError(error_msg)
-        
+
         logger.info("✅ Configuración validada correctamente")
     
+    @staticmethod
+    def _flatten(config_obj: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Mapa plano 'seccion.clave' -> valor, calculado una vez por carga.
+        Incluye también las secciones intermedias ('browser' -> dict).
+        """
+        flat: Dict[str, Any] = {}
+        stack = [('', config_obj)]
+        push, pop = stack.append, stack.pop
+        while stack:
+            prefix, node = pop()
+            for k, v in node.items():
+                path = prefix + k
+                flat[path] = v
+                if type(v) is dict:
+                    push((path + '.', v))
+        return flat
+
     def get(self, key: str, default: Any = None) -> Any:
         """
         Obtener valor de configuración usando dot notation
@@ -172,34 +291,35 @@ class ConfigLoader:
         Returns:
             Valor de configuración o default si no existe
         """
-        try:
-            keys = key.split('.')
-            value = self.config
-            
-            for k in keys:
-                if isinstance(value, dict) and k in value:
-                    value = value[k]
-                else:
-                    return default
-            
-            return value
-        except (KeyError, AttributeError, TypeError):
-            return default
+        return self._flat.get(key, default)
     
-    def get_all(self) -> Dict[str, Any]:
+    def get_all(self) -> Mapping[str, Any]:
         """
         Obtener toda la configuración
         
         Returns:
-            Diccionario con toda la configuración
+            Vista de solo lectura (MappingProxyType) de la configuración: el
+            config y su mapa plano/caché no pueden desincronizarse por una escritura
         """
-        return self.config
+        return MappingProxyType(self.config)
     
-    def reload(self):
-        """Recargar configuración"""
+    def reload(self, force: bool = False):
+        """
+        Recargar configuración. Solo se vuelve a parsear config.json si cambió
+        en disco, salvo force=True (p.ej. tras cambiar variables de entorno).
+        """
         logger.info("🔄 Recargando configuración...")
-        self._initialized = False
-        self.__init__()
+        if force:
+            self._cache.clear()
+        # En sitio: los módulos que importaron `config` siguen viendo la misma instancia
+        self._setup()
+
+
+@lru_cache(maxsize=1)
+def get_config_loader() -> ConfigLoader:
+    """Instancia única de ConfigLoader (la crea la primera llamada)."""
+    return ConfigLoader()
+
 
 # Instancia global singleton
-config = ConfigLoader()
\ No newline at end of file
+config = get_config_loader()
\ No newline at end of file
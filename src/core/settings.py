@@ -5,54 +5,122 @@ Lee valores desde config_loader (que ya resuelve .env + config.json).
 """
 
 import logging
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from types import MappingProxyType, SimpleNamespace
+from typing import Dict, Any, FrozenSet, List, Mapping, Optional
 from .config_loader import config
 
 logger = logging.getLogger(__name__)
 
 
 def has_placeholder(value: str) -> bool:
-    """True si el string contiene {{PLACEHOLDER}}."""
-    return isinstance(value, str) and "{{" in value and "}}" in value
+    """True si el string contiene {{PLACEHOLDER}} (la apertura basta: el loader ya cerró la gramática)."""
+    return type(value) is str and "{{" in value
 
 
-class Settings:
-    _instance = None
+_TRUE = frozenset(("1", "true", "yes", "y", "on", "t"))
+_FALSE = frozenset(("0", "false", "no", "n", "off", "f", ""))
+
+
+@lru_cache(maxsize=128)
+def _str_to_bool(value: str, default: bool) -> bool:
+    v = value.strip().lower()
+    if v in _TRUE:
+        return True
+    if v in _FALSE:
+        return False
+    return default
+
+
+def _to_bool(value: Any, default: bool = False) -> bool:
+    """Bool desde config/.env: acepta True/False, 'true'/'yes'/'on'/'1' y sus negativos."""
+    if value is True or value is False:
+        return value
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return _str_to_bool(value, default)
+    return bool(value)
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(Settings, cls).__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
+
+class Settings:
+    """
+    Los valores de configuración no cambian durante la ejecución: cada uno se
+    calcula una vez (cached_property) y reload() los invalida.
+    Las rutas (Path) también: todas las lecturas comparten el mismo objeto.
+    """
+
+    # Atributos que se crean en _initialize(): su primer acceso dispara la carga
+    _LAZY_ATTRS = frozenset({
+        '_allowed_file_extensions', 'log_level_int', '_browser_config', '_analisis_config',
+        '_dirs_ensured',
+    })
+
+    def __init__(self):
+        # Carga diferida hasta el primer valor que se pida (ver __getattr__)
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self._LAZY_ATTRS:
+            self._initialize()
+            return self.__dict__[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
 
     def _initialize(self):
-        self._config = config.get_all()
+        # URLs validadas una vez al cargar (antes de crear nada: si falla no queda estado a medias)
+        self._validate_urls()
+        # Extensiones normalizadas una sola vez (minúsculas, pertenencia O(1))
+        self._allowed_file_extensions = frozenset(
+            str(e).lower() for e in config.get("analisis.allowed_file_extensions", [".xlsx", ".xls"])
+        )
+        # Nivel de logging resuelto una sola vez (texto -> int)
+        self.log_level_int = getattr(logging, str(config.get("app.log_level", "INFO")).upper(), logging.INFO)
+        # Carpetas ya creadas/verificadas por ensure_directories_exist
+        self._dirs_ensured: set = set()
+        # Dicts de conveniencia armados una vez (reload() los vuelve a construir)
+        # (solo lectura: se comparten sin copias defensivas)
+        self._browser_config = MappingProxyType({
+            "headless": self.browser_headless,
+            "slow_mo": self.browser_slow_mo,
+            "viewport": MappingProxyType({"width": self.browser_viewport_width, "height": self.browser_viewport_height}),
+            "timeout": self.browser_timeout,
+            "user_agent": self.browser_user_agent,
+        })
+        self._analisis_config = MappingProxyType({
+            "default_parametro": self.default_parametro,
+            "default_servicio": self.default_servicio,
+            "allowed_extensions": self._allowed_file_extensions,
+            "max_file_size": self.max_file_size_mb,
+            "wait_times": MappingProxyType({
+                "after_upload": self.wait_after_upload_ms,
+                "after_submit": self.wait_after_submit_ms,
+            }),
+        })
         logger.info("✅ Settings inicializado")
 
     # ========= App =========
-    @property
+    @cached_property
     def app_name(self) -> str:
         return config.get("app.name", "NOVALYTICS-BOT")
 
-    @property
+    @cached_property
     def app_version(self) -> str:
         return config.get("app.version", "1.0.0")
 
-    @property
+    @cached_property
     def environment(self) -> str:
         return config.get("app.environment", "development")
 
-    @property
+    @cached_property
     def log_level(self) -> int:
         """
         Nivel de logging como INT (INFO/DEBUG/ERROR).
         Convierte desde texto del config.json (app.log_level).
         """
-        level_str = str(config.get("app.log_level", "INFO")).upper()
-        return getattr(logging, level_str, logging.INFO)
+        return self.log_level_int
     # ========= URLs =========
-    @property
+    @cached_property
     def base_url(self) -> str:
         raw = config.get("urls.base_url")
         if not isinstance(raw, str) or has_placeholder(raw):
@@ -69,187 +137,256 @@ class Settings:
             return f"{self.base_url}/{fallback_path.lstrip('/')}"
         return value
 
-    @property
+    # URLs que se navegan: absolutas (http/https) y sin {{PLACEHOLDER}}
+    _URL_PROPERTIES = ("home_url", "login_url", "analisis_url", "configuracion_url", "post_login_url")
+
+    @staticmethod
+    def _checked_url(name: str, url: Any) -> str:
+        """Valida la URL al resolver su property (una vez: el resultado queda en caché)."""
+        if not isinstance(url, str) or has_placeholder(url) or not url.startswith(("http://", "https://")):
+            raise ValueError(f"URL inválida en {name}: {url!r}. Revisa BASE_URL/LOGIN_URL en tu .env o config.json.")
+        return url
+
+    def _validate_urls(self) -> None:
+        """Resuelve (y con ello valida) todas las URLs de una vez."""
+        for name in self._URL_PROPERTIES:
+            getattr(self, name)
+
+    @cached_property
     def home_url(self) -> str:
         raw = config.get("urls.home_url")
-        return self._ensure_url(raw, "")
+        return self._checked_url("home_url", self._ensure_url(raw, ""))
 
-    @property
+    @cached_property
     def login_url(self) -> str:
         raw = config.get("urls.login_url")
-        return self._ensure_url(raw, "/login")
+        return self._checked_url("login_url", self._ensure_url(raw, "/login"))
 
-    @property
+    @cached_property
     def analisis_url(self) -> str:
         raw = config.get("urls.analisis_url")
-        return self._ensure_url(raw, "/iniciar-analisis")
+        return self._checked_url("analisis_url", self._ensure_url(raw, "/iniciar-analisis"))
 
-    @property
+    @cached_property
     def configuracion_url(self) -> str:
         raw = config.get("urls.configuracion_url")
-        return self._ensure_url(raw, "/configuracion")
+        return self._checked_url("configuracion_url", self._ensure_url(raw, "/configuracion"))
 
-    @property
+    @cached_property
     def timeout(self) -> int:
         return int(config.get("urls.timeout", 30000))
 
-    @property
+    @cached_property
     def navigation_timeout(self) -> int:
         return int(config.get("urls.navigation_timeout", 60000))
 
     # ========= Paths =========
-    @property
+    @cached_property
     def shared_folder(self) -> Path:
         folder_path = config.get("paths.shared_folder")
         return Path(folder_path) if folder_path else Path.cwd() / "data" / "shared"
 
-    @property
+    @cached_property
     def downloads_folder(self) -> Path:
         return Path(config.get("paths.downloads_folder", "./data/downloads"))
 
-    @property
+    @cached_property
     def uploads_folder(self) -> Path:
         return Path(config.get("paths.uploads_folder", "./data/uploads"))
 
-    @property
+    @cached_property
     def screenshots_folder(self) -> Path:
         return Path(config.get("paths.screenshots_folder", "./data/screenshots"))
 
-    @property
+    @cached_property
     def logs_folder(self) -> Path:
         return Path(config.get("paths.logs_folder", "./logs"))
 
-    @property
+    @cached_property
     def reports_folder(self) -> Path:
         return Path(config.get("paths.reports_folder", "./data/reports"))
 
-    @property
+    @cached_property
     def backups_folder(self) -> Path:
         return Path(config.get("paths.backup_folder", "./data/backups"))
 
     # ========= Análisis =========
-    @property
+    @cached_property
     def default_parametro(self) -> str:
         return str(config.get("analisis.default_parametro", "1"))
 
-    @property
+    @cached_property
     def default_servicio(self) -> str:
         return str(config.get("analisis.default_servicio", "1"))
 
-    @property
-    def allowed_file_extensions(self) -> List[str]:
-        return list(config.get("analisis.allowed_file_extensions", [".xlsx", ".xls"]))
+    @cached_property
+    def allowed_file_extensions(self) -> FrozenSet[str]:
+        return self._allowed_file_extensions
 
-    @property
+    @cached_property
     def max_file_size_mb(self) -> int:
         return int(config.get("analisis.max_file_size_mb", 50))
 
-    @property
+    @cached_property
     def wait_after_upload_ms(self) -> int:
         return int(config.get("analisis.wait_after_upload_ms", 2000))
 
-    @property
+    @cached_property
     def wait_after_submit_ms(self) -> int:
         return int(config.get("analisis.wait_after_submit_ms", 10000))
 
+    @cached_property
+    def analysis_result_timeout_ms(self) -> int:
+        """Espera máxima del estado del análisis tras 'Iniciar' (ajustar al P99 observado)."""
+        return int(config.get("analisis.result_timeout_ms", 120000))
+
+    @cached_property
+    def max_parallel_uploads(self) -> int:
+        """Procesos worker para subir en paralelo (1 = secuencial, una sola sesión)."""
+        return max(1, int(config.get("analisis.max_parallel_uploads", 1)))
+
+    @cached_property
+    def async_uploads(self) -> bool:
+        """Subidas con la API async de Playwright: un navegador, max_parallel_uploads páginas en un solo loop."""
+        return _to_bool(config.get("analisis.async_uploads"), False)
+
     # ========= Browser =========
-    @property
+    @cached_property
     def browser_headless(self) -> bool:
-        v = config.get("browser.headless", False)
-        if isinstance(v, str):
-            return v.strip().lower() == "true"
-        return bool(v)
+        return _to_bool(config.get("browser.headless"), False)
 
-    @property
+    @cached_property
     def browser_slow_mo(self) -> int:
         return int(config.get("browser.slow_mo", 100))
 
-    @property
+    @cached_property
     def browser_viewport_width(self) -> int:
         return int(config.get("browser.viewport_width", 1280))
 
-    @property
+    @cached_property
     def browser_viewport_height(self) -> int:
         return int(config.get("browser.viewport_height", 720))
 
-    @property
+    @cached_property
     def browser_timeout(self) -> int:
         return int(config.get("browser.timeout", 30000))
 
-    @property
+    @cached_property
     def browser_user_agent(self) -> str:
         return config.get(
             "browser.user_agent",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         )
 
+    @cached_property
+    def browser_pool_size(self) -> int:
+        """Máximo de Chromium pre-lanzados en BrowserPool."""
+        return max(1, int(config.get("browser.pool_size", 2)))
+
+    @cached_property
+    def login_fast_mode(self) -> bool:
+        """Durante el login, no descargar imágenes, fuentes ni media."""
+        return _to_bool(config.get("browser.login_fast_mode"), True)
+
     # ========= Credenciales =========
-    @property
+    @cached_property
     def username(self) -> Optional[str]:
         return config.get("credentials.username") or config.get("APP_USERNAME")
 
-    @property
+    @cached_property
     def password(self) -> Optional[str]:
         return config.get("credentials.password") or config.get("APP_PASSWORD")
 
     # ========= Monitoring =========
-    @property
+    @cached_property
     def monitoring_interval_seconds(self) -> int:
         return int(config.get("monitoring.check_interval_seconds", 60))
 
-    @property
+    @cached_property
+    def force_polling(self) -> bool:
+        """Forzar PollingObserver aunque la carpeta no se detecte como share de red."""
+        return _to_bool(config.get("monitoring.force_polling"), False)
+
+    @cached_property
+    def watch_interval_sec(self) -> float:
+        """Intervalo del PollingObserver (solo shares de red). Menor = detección más rápida, más syscalls."""
+        return max(1.0, float(config.get("monitoring.watch_interval_sec", 15.0)))
+
+    @cached_property
     def monitoring_allowed_extensions(self) -> List[str]:
         return list(config.get("monitoring.allowed_extensions", [".xlsx", ".xls", ".csv"]))
 
-    @property
+    @cached_property
     def delete_after_processing(self) -> bool:
-        v = config.get("monitoring.delete_after_processing", False)
-        if isinstance(v, str):
-            return v.strip().lower() == "true"
-        return bool(v)
+        return _to_bool(config.get("monitoring.delete_after_processing"), False)
 
-    @property
+    @cached_property
     def move_processed_files(self) -> bool:
-        v = config.get("monitoring.move_processed_files", True)
-        if isinstance(v, str):
-            return v.strip().lower() == "true"
-        return bool(v)
+        return _to_bool(config.get("monitoring.move_processed_files"), True)
+
+    @cached_property
+    def idempotency_ttl_days(self) -> float:
+        """Días que se recuerda un archivo ya subido (registro de idempotencia)."""
+        return float(config.get("monitoring.idempotency_ttl_days", 30))
 
-    @property
+    @cached_property
     def processed_folder(self) -> Path:
         return Path(config.get("monitoring.processed_folder", "./data/processed"))
 
     # ========= Retry =========
-    @property
+    @cached_property
     def max_retry_attempts(self) -> int:
         return int(config.get("retry.max_attempts", 3))
 
-    @property
+    @cached_property
     def retry_delay_ms(self) -> int:
         return int(config.get("retry.delay_between_attempts_ms", 2000))
 
-    @property
+    @cached_property
     def retry_timeout_ms(self) -> int:
         return int(config.get("retry.timeout_per_attempt_ms", 15000))
 
     # ========= Login/Playwright extra =========
-    @property
+    @cached_property
     def storage_state_path(self) -> Path:
         return Path(config.get("STORAGE_STATE_PATH", "./data/auth/storage.json"))
 
-    @property
+    @cached_property
     def login_timeout_ms(self) -> int:
         return int(config.get("LOGIN_TIMEOUT_MS", 30000))
 
-    @property
+    @cached_property
     def force_relogin(self) -> bool:
-        v = config.get("FORCE_RELOGIN", "false")
-        return str(v).strip().lower() == "true"
+        return _to_bool(config.get("FORCE_RELOGIN"), False)
+
+    @cached_property
+    def session_ttl_seconds(self) -> float:
+        """Segundos que un storage_state recién guardado se da por válido sin rehacer el login."""
+        return max(0.0, float(config.get("session.ttl_seconds", 1800)))
 
-    @property
+    @cached_property
     def post_login_url(self) -> Optional[str]:
         v = config.get("POST_LOGIN_URL", None)
-        return v if v else None
+        return self._checked_url("post_login_url", v) if v else None
+
+    @cached_property
+    def enable_keepalive(self) -> bool:
+        return _to_bool(config.get("session.enable_keepalive"), False)
+
+    @cached_property
+    def reuse_browser(self) -> bool:
+        """Reutilizar la misma sesión de navegador para todos los archivos."""
+        return _to_bool(config.get("session.reuse_browser"), True)
+
+    @cached_property
+    def keepalive_interval(self) -> float:
+        """Segundos entre pings de keepalive de la sesión."""
+        return max(1.0, float(config.get("session.keepalive_interval_sec", 120)))
+
+    @cached_property
+    def keepalive_mouse_activity(self) -> bool:
+        """Enviar un mousemove sintético en cada keepalive (solo si el backend mide actividad)."""
+        return _to_bool(config.get("session.keepalive_mouse_activity"), False)
 
     # ========= Helpers =========
     def ensure_directories_exist(self):
@@ -265,9 +402,25 @@ class Settings:
             self.backups_folder,
             Path("./data/auth"),
         ]
-        for d in directories:
-            d.mkdir(parents=True, exist_ok=True)
-            logger.info(f"📁 Carpeta asegurada: {d}")
+        # Las ya aseguradas en esta carga de config no vuelven a tocar el disco
+        pending = [d for d in directories if d not in self._dirs_ensured]
+        if not pending:
+            return
+        # Un stat por carpeta; solo se sube por los padres de las que faltan
+        missing = set()
+        for d in pending:
+            while d not in missing and not d.is_dir():
+                missing.add(d)
+                if d.parent == d:
+                    break
+                d = d.parent
+        # Del más corto al más largo: cada padre ya existe al crear su hijo
+        for d in sorted(missing, key=lambda p: len(p.parts)):
+            d.mkdir(exist_ok=True)
+            logger.debug("📁 Carpeta creada: %s", d)
+        if missing:
+            logger.info("📁 %s carpeta(s) creada(s)", len(missing))
+        self._dirs_ensured.update(pending)
 
     def is_production(self) -> bool:
         return self.environment.lower() == "production"
@@ -275,32 +428,42 @@ class Settings:
     def is_development(self) -> bool:
         return self.environment.lower() == "development"
 
-    def get_browser_config(self) -> Dict[str, Any]:
-        return {
-            "headless": self.browser_headless,
-            "slow_mo": self.browser_slow_mo,
-            "viewport": {"width": self.browser_viewport_width, "height": self.browser_viewport_height},
-            "timeout": self.browser_timeout,
-            "user_agent": self.browser_user_agent,
-        }
+    def get_browser_config(self) -> Mapping[str, Any]:
+        """Vista de solo lectura armada en _initialize (dict(...) si se necesita modificar)."""
+        return self._browser_config
 
-    def get_analisis_config(self) -> Dict[str, Any]:
-        return {
-            "default_parametro": self.default_parametro,
-            "default_servicio": self.default_servicio,
-            "allowed_extensions": self.allowed_file_extensions,
-            "max_file_size": self.max_file_size_mb,
-            "wait_times": {
-                "after_upload": self.wait_after_upload_ms,
-                "after_submit": self.wait_after_submit_ms,
-            },
-        }
+    def get_analisis_config(self) -> Mapping[str, Any]:
+        """Vista de solo lectura armada en _initialize (dict(...) si se necesita modificar)."""
+        return self._analisis_config
+
+    def snapshot(self) -> SimpleNamespace:
+        """
+        Todos los valores (cached_property) resueltos de una vez en un namespace.
+        Se arma en la primera llamada y reload() lo invalida.
+        """
+        snap = self.__dict__.get("_snapshot")
+        if snap is None:
+            snap = SimpleNamespace(**{
+                name: getattr(self, name)
+                for name, attr in vars(type(self)).items()
+                if isinstance(attr, cached_property)
+            })
+            self._snapshot = snap
+        return snap
 
     def reload(self):
         config.reload()
+        # cached_property guarda en __dict__: se vacía para recalcular todo
+        self.__dict__.clear()
         self._initialize()
         logger.info("🔄 Configuración recargada")
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Instancia única de Settings (la crea la primera llamada)."""
+    return Settings()
+
+
 # instancia singleton
-settings = Settings()
+settings = get_settings()
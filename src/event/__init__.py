@@ -3,12 +3,18 @@ from .file_monitor import (
     FileMonitor,
     archive_file,
     get_file_info,
+    is_network_mount,
     move_file,
+    needs_polling,
 )
+from .processed_registry import ProcessedRegistry
 
 __all__ = [
     "FileMonitor",
+    "ProcessedRegistry",
     "archive_file",
     "get_file_info",
+    "is_network_mount",
     "move_file",
+    "needs_polling",
 ]
@@ -5,13 +5,18 @@ Monitor de carpeta con Watchdog:
 - Llama un callback con Path del archivo
 - Soporta shares UNC y movimientos entre volúmenes (shutil.move)
 """
+import errno
 import os
 import time
 import shutil
+import signal
 import logging
+import queue
 from pathlib import Path
-from typing import Callable, List, Optional, Dict
+import threading
+from typing import Callable, List, Optional, Dict, Set, Tuple, Union
 from datetime import datetime
+from functools import lru_cache
 
 from watchdog.observers import Observer
 from watchdog.observers.polling import PollingObserver
@@ -22,76 +27,243 @@ from src.core import settings
 logger = logging.getLogger(__name__)
 
 
-def _is_file_stable(file: Path, wait_ms: int = 800) -> bool:
-    """Verifica que el archivo haya terminado de copiarse comparando tamaños."""
+# Tipos de FS de red donde inotify/ReadDirectoryChangesW no es fiable
+_NETWORK_FS_TYPES = frozenset({"nfs", "nfs4", "cifs", "smbfs", "smb3", "fuse.sshfs"})
+_DRIVE_REMOTE = 4  # GetDriveTypeW
+
+
+def is_network_mount(path: Path) -> bool:
+    """
+    True si la carpeta vive en un share de red (UNC/SMB/NFS).
+    - Windows: GetDriveTypeW == DRIVE_REMOTE (incluye rutas UNC)
+    - Linux: tipo de FS del punto de montaje en /proc/mounts
+    Ante cualquier duda devuelve False (se usa el Observer nativo).
+    """
     try:
-        s1 = file.stat().st_size
-        time.sleep(max(0.05, wait_ms / 1000.0))
-        s2 = file.stat().st_size
-        return s1 == s2 and s2 > 0
-    except FileNotFoundError:
+        if os.name == "nt":
+            import ctypes
+            drive = os.path.splitdrive(os.path.abspath(str(path)))[0]
+            return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == _DRIVE_REMOTE
+
+        target = os.path.realpath(str(path))
+        best, fstype = "", ""
+        with open("/proc/mounts", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mnt = parts[1].replace("\\040", " ")
+                inside = target == mnt or target.startswith(mnt.rstrip("/") + "/")
+                if inside and len(mnt) > len(best):
+                    best, fstype = mnt, parts[2]
+        return fstype in _NETWORK_FS_TYPES
+    except Exception:
         return False
 
 
+def needs_polling(path: Path) -> bool:
+    """
+    True si la carpeta solo se puede vigilar con PollingObserver: rutas UNC
+    (\\\\servidor\\share, //servidor/share) o montajes de red. Evita intentar
+    el Observer nativo, que en un share inaccesible puede bloquear hasta el
+    timeout RPC del sistema antes de fallar.
+    """
+    s = str(path)
+    return s.startswith(("\\\\", "//")) or is_network_mount(path)
+
+
 class FileHandler(FileSystemEventHandler):
-    """Manejador de eventos: on_created / on_moved / on_modified."""
+    """
+    Manejador de eventos: on_created / on_moved / on_modified / on_closed.
+    La estabilidad (copia terminada) no bloquea el hilo de eventos: cada candidato
+    queda en `_pending` y un único hilo lo revisa cada `sweep_interval` segundos;
+    se entrega cuando su (tamaño, mtime) no cambia durante la ventana de estabilidad.
+    En Linux (inotify) el cierre de escritura (FileClosedEvent) lo entrega al instante.
+    El callback corre en su propio hilo (cola `_ready`): uno lento no frena ni al
+    hilo de eventos de watchdog ni al de estabilidad.
+    """
+
+    # Tamaño a partir del cual se purgan entradas viejas del debounce
+    _RECENT_MAX = 512
+    # Segundos durante los que un evento con la misma firma (tamaño, mtime) se descarta
+    _SIGNATURE_TTL = 30.0
 
-    def __init__(self, callback: Callable[[Path], None], allowed_extensions: List[str], debounce_sec: float = 1.0):
+    def __init__(self, callback: Callable[[Path], None], allowed_extensions: List[str],
+                 debounce_sec: float = 1.0, sweep_interval: float = 0.5):
         self.callback = callback
-        self.allowed_extensions = [ext.lower() for ext in allowed_extensions]
+        self.allowed_extensions = frozenset(ext.lower() for ext in allowed_extensions)
         self.debounce_sec = max(0.1, float(debounce_sec))
-        self._recent: Dict[Path, float] = {}
-        logger.info(f"📁 Manejador inicializado para extensiones: {self.allowed_extensions}")
+        self.sweep_interval = max(0.05, float(sweep_interval))
+        # ruta (str del evento) -> (tamaño, mtime_ns, time.time()) del último evento aceptado
+        self._recent: Dict[str, Tuple[int, int, float]] = {}
+        # path -> (tamaño, mtime_ns, instante monotónico del último cambio visto)
+        self._pending: Dict[Path, Tuple[int, int, float]] = {}
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        # Archivos listos para el callback; `_queued` colapsa repeticiones en cola
+        self._ready: "queue.Queue[Optional[Tuple[Path, int]]]" = queue.Queue()
+        self._queued: Set[Path] = set()
+        self._dispatcher: Optional[threading.Thread] = None
+        self.reload_settings()
+        logger.info("📁 Manejador inicializado para extensiones: %s", sorted(self.allowed_extensions))
+
+    def start(self) -> None:
+        """Arranca los hilos de estabilidad (pendientes) y de entrega (callback)."""
+        if self._sweeper is None:
+            self._stop.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="stability-sweeper", daemon=True)
+            self._sweeper.start()
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="file-dispatcher", daemon=True)
+            self._dispatcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=2.0)
+            self._sweeper = None
+        if self._dispatcher is not None:
+            self._ready.put(None)
+            self._dispatcher.join(timeout=2.0)
+            self._dispatcher = None
+
+    def reload_settings(self) -> None:
+        """Toma de settings los valores usados por evento (llamar tras settings.reload())."""
+        self._max_bytes = settings.max_file_size_mb * 1024 * 1024
+        self._stability_sec = max(800, settings.retry_delay_ms) / 1000.0
 
     def on_created(self, event: FileSystemEvent):
         if not event.is_directory:
-            self._process(Path(event.src_path))
+            self._process(event.src_path)
 
     def on_moved(self, event: FileSystemEvent):
         if not event.is_directory and getattr(event, "dest_path", None):
-            self._process(Path(event.dest_path))
+            self._process(event.dest_path)
 
     def on_modified(self, event: FileSystemEvent):
         if not event.is_directory:
-            self._process(Path(event.src_path))
+            self._process(event.src_path)
+
+    def on_closed(self, event: FileSystemEvent):
+        # IN_CLOSE_WRITE: el escritor cerró el archivo, no hace falta esperar estabilidad
+        if not event.is_directory:
+            self._process(event.src_path, closed=True)
 
-    def _process(self, file: Path):
-        """Validaciones + callback si procede."""
+    def _process(self, src_path: str, closed: bool = False):
+        """Validaciones; el archivo queda pendiente de estabilidad (o se entrega si ya se cerró)."""
         try:
-            # Debounce por path
+            # Extensión sobre el string crudo: no se crea un Path para los descartados
+            if os.path.splitext(src_path)[1].lower() not in self.allowed_extensions:
+                return
+
+            # Debounce por path (el cierre siempre pasa: es la señal definitiva)
             now = time.time()
-            last = self._recent.get(file)
-            if last and (now - last) < self.debounce_sec:
+            last = self._recent.get(src_path)
+            if not closed and last and (now - last[2]) < self.debounce_sec:
                 return
-            self._recent[file] = now
 
-            if not file.exists():
+            # Único stat del evento: su resultado sirve para existencia, tamaño y firma
+            try:
+                st = os.stat(src_path)
+            except FileNotFoundError:
+                return
+            if st.st_size == 0:
                 return
 
-            size = file.stat().st_size
-            if size == 0:
+            # Ráfagas de on_modified sin cambios reales (misma firma) se cortan aquí
+            sig = (st.st_size, st.st_mtime_ns)
+            if not closed and last and last[:2] == sig and (now - last[2]) < self._SIGNATURE_TTL:
                 return
+            self._recent[src_path] = (*sig, now)
+            if len(self._recent) > self._RECENT_MAX:
+                self._prune_recent(now)
 
-            if file.suffix.lower() not in self.allowed_extensions:
+            if st.st_size > self._max_bytes:
+                logger.warning("⚠️ Archivo muy grande: %s", os.path.basename(src_path))
                 return
 
-            max_mb = settings.max_file_size_mb
-            if (size / (1024 * 1024)) > max_mb:
-                logger.warning(f"⚠️ Archivo muy grande: {file.name}")
+            file = Path(src_path)
+            if closed:
+                with self._pending_lock:
+                    self._pending.pop(file, None)
+                self._fire(file, st.st_size)
+            else:
+                self.track(file, st)
+
+        except Exception as e:
+            logger.error("❌ Error procesando archivo %s: %s", src_path, e, exc_info=True)
+
+    def _prune_recent(self, now: float) -> None:
+        """Descarta entradas de debounce viejas para que `_recent` no crezca sin límite."""
+        cutoff = now - max(self.debounce_sec * 10, self._SIGNATURE_TTL)
+        self._recent = {k: v for k, v in self._recent.items() if v[2] > cutoff}
+
+    def track(self, file: Path, st: Optional[os.stat_result] = None) -> None:
+        """Deja el archivo en espera de estabilidad (idempotente si ya estaba pendiente)."""
+        st = st or file.stat()
+        with self._pending_lock:
+            if file not in self._pending:
+                self._pending[file] = (st.st_size, st.st_mtime_ns, time.monotonic())
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self._sweep()
+            except Exception as e:
+                logger.error("❌ Error revisando archivos pendientes: %s", e, exc_info=True)
+
+    def _sweep(self) -> None:
+        """Un stat por pendiente: entrega los que no cambiaron durante la ventana de estabilidad."""
+        with self._pending_lock:
+            items = list(self._pending.items())
+        if not items:
+            return
+        now = time.monotonic()
+        ready = []
+        for file, (size, mtime_ns, since) in items:
+            try:
+                st = file.stat()
+            except FileNotFoundError:
+                with self._pending_lock:
+                    self._pending.pop(file, None)
+                continue
+            with self._pending_lock:
+                if file not in self._pending:
+                    continue  # ya entregado por on_closed
+                if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                    self._pending[file] = (st.st_size, st.st_mtime_ns, now)
+                elif st.st_size > 0 and now - since >= self._stability_sec:
+                    del self._pending[file]
+                    ready.append((file, st.st_size))
+        for file, size in ready:
+            self._fire(file, size)
+
+    def _fire(self, file: Path, size: int) -> None:
+        """Encola el archivo para el callback (si ya está en cola, no se repite)."""
+        with self._pending_lock:
+            if file in self._queued:
                 return
+            self._queued.add(file)
+        self._ready.put((file, size))
 
-            # Esperar a que termine de copiarse
-            if not _is_file_stable(file, wait_ms=max(800, settings.retry_delay_ms)):
-                time.sleep(max(0.2, settings.retry_delay_ms / 1000.0))
-                if not _is_file_stable(file, wait_ms=max(800, settings.retry_delay_ms)):
-                    logger.debug(f"⏳ Aún inestable: {file.name}")
-                    return
+    def _dispatch_loop(self) -> None:
+        while True:
+            item = self._ready.get()
+            if item is None:
+                return
+            file, size = item
+            with self._pending_lock:
+                self._queued.discard(file)
+            logger.info("📥 Detectado: %s (%d bytes) ruta='%s'", file.name, size, file)
+            try:
+                self.callback(file)
+            except Exception as e:
+                logger.error("❌ Error procesando archivo %s: %s", file, e, exc_info=True)
 
-            logger.info(f"📥 Detectado: {file.name} ({size} bytes) ruta='{file}'")
-            self.callback(file)
 
-        except Exception as e:
-            logger.error(f"❌ Error procesando archivo {file}: {e}", exc_info=True)
+# Tramo de espera de run_continuous: acota lo que tarda en atender CTRL+C
+_JOIN_POLL_SEC = 0.5
 
 
 class FileMonitor:
@@ -99,6 +271,7 @@ class FileMonitor:
 
     def __init__(self):
         self.observer: Optional[Observer] = None # type: ignore
+        self.handler: Optional[FileHandler] = None
         self.is_monitoring: bool = False
         self.callback: Optional[Callable[[Path], None]] = None
 
@@ -109,76 +282,86 @@ class FileMonitor:
         # Si quieres forzar polling (más compatible en shares/red), pon True desde main
         self.use_polling: bool = False
 
-        logger.info("📋 Config monitoreo:")
-        logger.info(f"   📁 Carpeta: {self.monitor_folder}")
-        logger.info(f"   📝 Extensiones: {self.allowed_extensions}")
-        logger.info(f"   ⏰ Intervalo: {self.check_interval}s")
+        logger.info("📋 Config monitoreo: 📁 %s | 📝 %s | ⏰ %ss",
+                    self.monitor_folder, self.allowed_extensions, self.check_interval)
 
     def _initial_sweep(self) -> None:
-        """Procesa archivos ya existentes al iniciar (si son válidos/estables)."""
+        """Encola en el manejador los archivos ya existentes al iniciar (se entregan al estabilizarse)."""
         try:
             count = 0
-            for p in self.monitor_folder.glob("*"):
-                if not p.is_file():
-                    continue
-                if p.suffix.lower() not in [e.lower() for e in self.allowed_extensions]:
-                    continue
-                if p.stat().st_size <= 0:
-                    continue
-                if not _is_file_stable(p, wait_ms=max(800, settings.retry_delay_ms)):
-                    continue
-                logger.info(f"🔎 Barrido inicial: {p.name}")
-                self._handle_file(p)
-                count += 1
+            exts = frozenset(e.lower() for e in self.allowed_extensions)
+            # scandir: tipo y stat salen del DirEntry; Path solo para los candidatos
+            with os.scandir(self.monitor_folder) as it:
+                for entry in it:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    if os.path.splitext(entry.name)[1].lower() not in exts:
+                        continue
+                    st = entry.stat()
+                    if st.st_size <= 0:
+                        continue
+                    logger.debug("🔎 Barrido inicial: %s", entry.name)
+                    self.handler.track(Path(entry.path), st)
+                    count += 1
             if count:
-                logger.info(f"✅ Barrido inicial procesó {count} archivo(s).")
+                logger.info("✅ Barrido inicial: %s archivo(s) en espera de estabilidad.", count)
             else:
                 logger.info("ℹ️ Barrido inicial: sin archivos candidatos.")
         except Exception as e:
-            logger.warning(f"⚠️ Error en barrido inicial: {e}", exc_info=True)
+            logger.warning("⚠️ Error en barrido inicial: %s", e, exc_info=True)
 
     def start(self, callback: Callable[[Path], None]) -> bool:
         """Inicia el monitoreo en la carpeta configurada."""
         try:
             self.monitor_folder.mkdir(parents=True, exist_ok=True)
             self.callback = callback
-            handler = FileHandler(self._handle_file, self.allowed_extensions, debounce_sec=1.0)
+            handler = self.handler = FileHandler(self._handle_file, self.allowed_extensions, debounce_sec=1.0)
+            handler.start()
             watch_path = str(self.monitor_folder.resolve())
 
-            try:
-                if self.use_polling:
-                    raise RuntimeError("Polling forzado por configuración")
-
-                # Observer nativo
-                self.observer = Observer()
+            # Se decide una vez; queda en use_polling para siguientes start()
+            if not self.use_polling and needs_polling(self.monitor_folder):
+                logger.info("🌐 Carpeta en red/UNC: se usa PollingObserver directamente")
+                self.use_polling = True
+
+            if not self.use_polling:
+                try:
+                    # Observer nativo
+                    self.observer = Observer()
+                    self.observer.schedule(handler, watch_path, recursive=False)
+                    self.observer.start()
+                    self.is_monitoring = True
+                    logger.info("🚀 Monitoreo iniciado (Observer nativo) en: %s", watch_path)
+                except Exception as native_err:
+                    logger.warning("⚠️ Falló Observer nativo → PollingObserver: %s", native_err)
+
+            if not self.is_monitoring:
+                # Polling (UNC/SMB, forzado por config o fallback del nativo)
+                self.observer = PollingObserver(timeout=settings.watch_interval_sec)
                 self.observer.schedule(handler, watch_path, recursive=False)
                 self.observer.start()
                 self.is_monitoring = True
-                logger.info(f"🚀 Monitoreo iniciado (Observer nativo) en: {watch_path}")
-            except Exception as native_err:
-                # Fallback: polling (ideal para UNC/SMB)
-                logger.warning(f"⚠️ Falló Observer nativo → PollingObserver: {native_err}")
-                self.observer = PollingObserver(timeout=1.0)
-                self.observer.schedule(handler, watch_path, recursive=False)
-                self.observer.start()
-                self.is_monitoring = True
-                logger.info(f"🚀 Monitoreo iniciado (PollingObserver) en: {watch_path}")
+                logger.info("🚀 Monitoreo iniciado (PollingObserver, cada %gs) en: %s", settings.watch_interval_sec, watch_path)
 
             # Barrido inicial
             self._initial_sweep()
             return True
         except Exception as e:
-            logger.error(f"❌ Error iniciando monitoreo: {e}", exc_info=True)
+            logger.error("❌ Error iniciando monitoreo: %s", e, exc_info=True)
+            if self.handler:
+                self.handler.stop()
             return False
 
     def stop(self) -> None:
         """Detiene el monitoreo (seguro en errores/teardown)."""
+        if self.handler:
+            self.handler.stop()
         if self.observer and self.is_monitoring:
             try:
                 self.observer.stop()
                 self.observer.join(timeout=3.0)
             except Exception as e:
-                logger.warning(f"⚠️ Error al detener observer: {e}", exc_info=True)
+                logger.warning("⚠️ Error al detener observer: %s", e, exc_info=True)
             finally:
                 self.is_monitoring = False
                 logger.info("⏹️ Monitoreo detenido")
@@ -187,66 +370,122 @@ class FileMonitor:
         """Envuelve el callback del usuario con logs/seguridad."""
         try:
             if self.callback:
-                logger.info(f"🎯 Callback: {file_path.name}")
+                logger.debug("🎯 Callback: %s", file_path.name)
                 self.callback(file_path)
             else:
                 logger.warning("⚠️ No hay callback configurado")
         except Exception as e:
-            logger.error(f"❌ Error en callback para {file_path.name}: {e}", exc_info=True)
+            logger.error("❌ Error en callback para %s: %s", file_path.name, e, exc_info=True)
 
     def run_continuous(self, callback: Callable[[Path], None]) -> None:
-        """Modo bloqueante sencillo (si no usas tu propio bucle principal)."""
+        """
+        Modo bloqueante sencillo (si no usas tu propio bucle principal).
+        Espera al hilo del observer en vez de despertar cada check_interval; CTRL+C lo detiene.
+        En Windows un join() sin timeout no ve CTRL+C: se espera en tramos cortos y
+        un handler de SIGINT (como runner.install_stop_handler) marca la salida.
+        """
         if not self.start(callback):
             return
+        interrupted = threading.Event()
+        previous = None
+
+        def _handler(signum, frame):
+            interrupted.set()
+            # Un segundo CTRL+C vuelve a lanzar KeyboardInterrupt
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        if threading.current_thread() is threading.main_thread():
+            previous = signal.signal(signal.SIGINT, _handler)
         try:
-            while self.is_monitoring:
-                time.sleep(self.check_interval)
+            while self.observer.is_alive() and not interrupted.is_set():
+                self.observer.join(timeout=_JOIN_POLL_SEC)
+            if interrupted.is_set():
+                logger.info("🛑 Interrupción recibida, deteniendo monitoreo...")
+        except KeyboardInterrupt:
+            logger.info("🛑 Interrupción recibida, deteniendo monitoreo...")
         finally:
+            if previous is not None:
+                signal.signal(signal.SIGINT, previous)
             self.stop()
 
 
 # ===== Utilidades extra =====
 
-def get_file_info(file_path: Path) -> dict:
-    """Información básica del archivo (útil para logs o UI)."""
-    st = file_path.stat()
+def get_file_info(file_path: Path, st: Optional[os.stat_result] = None) -> dict:
+    """
+    Información básica del archivo (útil para logs o UI).
+    Si quien llama ya tiene el stat del archivo, lo pasa en `st` y no se repite.
+    """
+    if st is None:
+        st = os.stat(file_path)
+    # Copia: el dict cacheado no se comparte con quien lo modifique
+    return dict(_format_info(os.fspath(file_path), st.st_size, st.st_ctime, st.st_mtime, st.st_mtime_ns))
+
+
+@lru_cache(maxsize=256)
+def _format_info(path_str: str, size: int, ctime: float, mtime: float, mtime_ns: int) -> dict:
+    """Arma el dict una vez por versión del archivo (ruta, tamaño, mtime_ns en la clave)."""
+    name = os.path.basename(path_str)
     return {
-        "name": file_path.name,
-        "size": st.st_size,
-        "size_mb": st.st_size / (1024 * 1024),
-        "created": datetime.fromtimestamp(st.st_ctime),
-        "modified": datetime.fromtimestamp(st.st_mtime),
-        "extension": file_path.suffix.lower(),
-        "path": str(file_path),
+        "name": name,
+        "size": size,
+        "size_mb": size / (1024 * 1024),
+        "created": datetime.fromtimestamp(ctime),
+        "modified": datetime.fromtimestamp(mtime),
+        "extension": os.path.splitext(name)[1].lower(),
+        "path": path_str,
     }
 
 
-def move_file(source: Path, destination: Path) -> bool:
+# Carpetas destino ya creadas por move_file (evita un mkdir por cada movimiento)
+_ensured_dirs: Set[str] = set()
+
+
+def move_file(source: Union[Path, str], destination: Union[Path, str]) -> bool:
     """
     Mover archivo de forma segura (soporta cross-volume/UNC).
-    Usa shutil.move: si es otro volumen, copia y luego elimina.
+    Mismo volumen: os.replace (rename atómico, un syscall). Solo si es otro
+    volumen (EXDEV) recurre a shutil.move, que copia y luego elimina.
+    Acepta Path o str (archive_file pasa strings ya armados).
     """
+    src, dst = os.fspath(source), os.fspath(destination)
+    name = os.path.basename(src)
+    parent = os.path.dirname(dst) or "."
     try:
-        destination.parent.mkdir(parents=True, exist_ok=True)
-        shutil.move(str(source), str(destination))
-        logger.info(f"📦 Archivo movido: {source.name} → {destination}")
+        if parent not in _ensured_dirs:
+            os.makedirs(parent, exist_ok=True)
+            _ensured_dirs.add(parent)
+        try:
+            os.replace(src, dst)
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                shutil.move(src, dst)
+            elif e.errno == errno.ENOENT and os.path.exists(src) and not os.path.isdir(parent):
+                # La carpeta destino se borró después de crearla: se vuelve a crear
+                os.makedirs(parent, exist_ok=True)
+                os.replace(src, dst)
+            else:
+                raise
+        logger.info("📦 Archivo movido: %s → %s", name, dst)
         return True
     except Exception as e:
-        logger.error(f"❌ Error moviendo {source.name} → {destination}: {e}", exc_info=True)
+        logger.error("❌ Error moviendo %s → %s: %s", name, dst, e, exc_info=True)
         return False
 
 
 def archive_file(file_path: Path) -> bool:
     """
     Mover a processed con sufijo timestamp (respetando settings.move_processed_files).
-    Usa move_file (shutil.move) para soportar UNC/otra unidad.
+    El movimiento lo hace move_file: os.replace en el mismo volumen, shutil.move
+    solo entre volúmenes distintos (otra unidad/UNC), y crea la carpeta si falta.
     """
     if not settings.move_processed_files:
         return True
     try:
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        dst = settings.processed_folder / f"{file_path.stem}_{ts}{file_path.suffix}"
-        return move_file(file_path, dst)
+        # Destino como str: os.replace/shutil.move no necesitan un Path intermedio
+        ts = time.strftime("%Y%m%d_%H%M%S")
+        dst = os.path.join(str(settings.processed_folder), f"{file_path.stem}_{ts}{file_path.suffix}")
     except Exception as e:
-        logger.error(f"❌ Error archivando {file_path.name}: {e}", exc_info=True)
+        logger.error("❌ Error archivando %s: %s", file_path.name, e, exc_info=True)
         return False
+    return move_file(file_path, dst)
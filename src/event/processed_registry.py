@@ -0,0 +1,78 @@
+"""
+Registro persistente de archivos ya subidos (idempotencia):
+- Clave por (ruta, mtime_ns, tamaño): el mismo archivo sin cambios no se re-sube
+- Persistido con shelve para sobrevivir reinicios/caídas
+- Expira entradas antiguas al abrir (TTL en días)
+"""
+import os
+import time
+import shelve
+import logging
+import threading
+from pathlib import Path
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessedRegistry:
+    """Conjunto de claves ya procesadas, en memoria (O(1)) y respaldado en disco."""
+
+    def __init__(self, db_path: Path, ttl_days: float = 30, sync_every: int = 10):
+        self.db_path = Path(db_path)
+        self.ttl_sec = max(0.0, float(ttl_days)) * 86400
+        self.sync_every = max(1, int(sync_every))
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._keys: Set[str] = set()
+        self._db: Optional[shelve.Shelf] = None
+        self._open()
+
+    @staticmethod
+    def key_for(file_path: Path, st: Optional[os.stat_result] = None) -> str:
+        """Clave de idempotencia: 'ruta|mtime_ns|tamaño'."""
+        st = st or file_path.stat()
+        return f"{file_path}|{st.st_mtime_ns}|{st.st_size}"
+
+    def _open(self) -> None:
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = shelve.open(str(self.db_path))
+            cutoff = time.time() - self.ttl_sec
+            expired = [k for k, ts in self._db.items() if self.ttl_sec and ts < cutoff]
+            for k in expired:
+                del self._db[k]
+            self._keys = set(self._db.keys())
+            if expired:
+                self._db.sync()
+            logger.info("🗂️ Registro de procesados: %s entrada(s), %s expirada(s)", len(self._keys), len(expired))
+        except Exception as e:
+            # Sin persistencia seguimos funcionando solo en memoria
+            self._db = None
+            logger.warning("⚠️ No se pudo abrir el registro de procesados (%s): %s", self.db_path, e)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def add(self, key: str) -> None:
+        with self._lock:
+            self._keys.add(key)
+            if self._db is None:
+                return
+            try:
+                self._db[key] = time.time()
+                self._pending_writes += 1
+                if self._pending_writes >= self.sync_every:
+                    self._db.sync()
+                    self._pending_writes = 0
+            except Exception as e:
+                logger.warning("⚠️ No se pudo persistir en el registro de procesados: %s", e)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                try:
+                    self._db.close()
+                except Exception:
+                    pass
+                self._db = None
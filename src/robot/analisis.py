@@ -6,10 +6,12 @@ Módulo de automatización para la página 'Iniciar análisis'.
 - Click en el botón correcto 'Iniciar' (i.bi-power) cuando esté habilitado
 """
 
+import os
 from pathlib import Path
 from time import sleep
-from typing import Optional, List, Dict, Tuple
+from typing import Optional
 import logging
+import weakref
 
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError
 from src.core import settings
@@ -33,6 +35,10 @@ SEL_FILE_NAME    = "#file-name"
 SEL_INICIAR_POWER_BTN_ALL     = "button.custom-button:has(i.bi-power)"
 SEL_INICIAR_POWER_BTN_ENABLED = "button.custom-button:has(i.bi-power):not([disabled])"
 
+# Espera corta para elementos opcionales (selects, label): una sola espera
+# en vez de query_selector + wait_for_selector
+OPTIONAL_WAIT_MS = 1500
+
 
 def _wait(page: Page, selector: str, state: str = "visible", timeout: Optional[int] = None):
     """Wrapper de espera con timeout por default desde settings."""
@@ -40,94 +46,72 @@ def _wait(page: Page, selector: str, state: str = "visible", timeout: Optional[i
 
 
 def go_to_analisis(page: Page) -> None:
-    """Asegura estar en /iniciar-analisis (por click en navbar o por URL directa)."""
-    try:
-        nav = page.query_selector(SEL_NAV_ANALISIS)
-        if nav:
-            nav.click()
-            page.wait_for_load_state("networkidle", timeout=settings.navigation_timeout)
-            return
-    except Exception:
-        pass
-
-    page.goto(settings.analisis_url, wait_until="domcontentloaded", timeout=settings.navigation_timeout)
-    page.wait_for_load_state("networkidle", timeout=settings.navigation_timeout)
-
-
-# ---------- Helpers de <select> ----------
-def _read_options(page: Page, selector: str) -> List[Dict[str, str]]:
-    """Lee opciones de un <select> como [{'value': '30', 'label': 'Escuchar Reclamos', 'disabled': false}, ...]."""
-    return page.eval_on_selector(
-        selector,
-        """(el) => Array.from(el.options).map(o => ({
-              value: o.value ?? '',
-              label: (o.textContent || '').trim(),
-              disabled: !!o.disabled
-        }))"""
-    )
-
-def _choose_option(options: List[Dict[str, str]], preferred: Optional[str], preferred_label: Optional[str]) -> Tuple[Optional[str], Optional[str], str]:
     """
-    Prioridad:
-      1) value == preferred
-      2) label == preferred_label (case-insensitive)
-      3) primera opción válida (value != '' y !disabled)
+    Carga /iniciar-analisis con un solo goto y una sola espera (networkidle).
+    Se navega aunque ya se esté en la página: así el formulario queda limpio
+    tras la subida anterior.
     """
-    if not options:
-        return None, None, "sin-opciones"
+    _install_page_helpers(page)
+    page.goto(settings.analisis_url, wait_until="networkidle", timeout=settings.navigation_timeout)
 
-    if preferred:
-        for o in options:
-            if o.get("value", "") == preferred:
-                return o["value"], o.get("label") or o["value"], "value-match"
 
-    if preferred_label:
-        pref_cf = preferred_label.casefold()
-        for o in options:
-            if (o.get("label") or "").casefold() == pref_cf:
-                return o["value"], o.get("label") or o["value"], "label-match"
-
-    for o in options:
-        if not o.get("disabled") and (o.get("value") or "") != "":
-            return o["value"], o.get("label") or o["value"], "first-nonempty"
-
-    return None, None, "solo-vacias/disabled"
-
-def _set_select_exact(page: Page, selector: str, preferred_value: Optional[str], preferred_label: Optional[str], nombre: str) -> None:
+# ---------- Helpers de <select> ----------
+# Elige, fija y notifica la opción en un solo viaje al navegador. Prioridad:
+#   1) value == preferido
+#   2) label == label preferido (sin distinguir mayúsculas)
+#   3) primera opción válida (value != '' y no disabled)
+# Devuelve {value, label, reason} o null si no hay opción válida.
+JS_SELECT_OPTION = """(el, { value, label }) => {
+    const opts = Array.from(el.options);
+    const text = (o) => (o.textContent || '').trim();
+    let reason = 'value-match';
+    let pick = value ? opts.find(o => o.value === value) : undefined;
+    if (!pick && label) {
+        const wanted = label.toLowerCase();
+        pick = opts.find(o => text(o).toLowerCase() === wanted);
+        reason = 'label-match';
+    }
+    if (!pick) {
+        pick = opts.find(o => !o.disabled && o.value !== '');
+        reason = 'first-nonempty';
+    }
+    if (!pick || pick.value === '') return null;
+    el.value = pick.value;
+    // Eventos para que el frontend reaccione
+    el.dispatchEvent(new Event('input', { bubbles: true }));
+    el.dispatchEvent(new Event('change', { bubbles: true }));
+    return { value: pick.value, label: text(pick) || pick.value, reason };
+}"""
+
+def _set_select_exact(page: Page, selector: str, preferred_value: Optional[str], preferred_label: Optional[str], nombre: str,
+                      timeout: Optional[int] = None) -> None:
     """
     Selecciona una opción específica en el <select>.
     preferred_value='30' (Escuchar Reclamos), preferred_label='Escuchar Reclamos' como respaldo.
+    Si ninguna coincide, JS_SELECT_OPTION elige la primera opción válida.
     """
-    _wait(page, selector, "visible")
-    options = _read_options(page, selector)
-    value, label, reason = _choose_option(options, preferred_value, preferred_label)
+    _wait(page, selector, "visible", timeout=timeout)
+    picked = page.eval_on_selector(selector, JS_CALL_SELECT, {"value": preferred_value, "label": preferred_label})
 
-    if value is None or value == "":
+    if not picked:
         raise RuntimeError(f"{nombre}: no se encontró una opción válida para seleccionar.")
+    if picked["reason"] == "first-nonempty" and (preferred_value or preferred_label):
+        logger.warning("⚠️ %s: no se encontró '%s', se usa la primera opción válida.", nombre, preferred_label or preferred_value)
 
-    try:
-        page.select_option(selector, value=value)
-    except Exception:
-        page.select_option(selector, label=label)
+    logger.info("✔️ %s: '%s' (value='%s', preferido='%s', modo='%s')",
+                nombre, picked["label"], picked["value"], preferred_value or preferred_label, picked["reason"])
 
-    # Eventos para que el frontend reaccione
-    try:
-        page.evaluate(
-            """(sel) => {
-                const el = document.querySelector(sel);
-                if (!el) return;
-                el.dispatchEvent(new Event('input', { bubbles: true }));
-                el.dispatchEvent(new Event('change', { bubbles: true }));
-            }""",
-            selector
-        )
-    except Exception:
-        pass
 
-    logger.info(f"✔️ {nombre}: '{label}' (value='{value}', preferido='{preferred_value or preferred_label}', modo='{reason}')")
+# ---------- Adjuntar archivo robusto ----------
+# True cuando #file-name muestra el nombre adjuntado (o si el display no existe)
+JS_FILE_NAME_SHOWN = """([sel, name]) => {
+    const el = document.querySelector(sel);
+    if (!el) return true;
+    const v = el.value || el.getAttribute('value') || el.placeholder || '';
+    return v.includes(name);
+}"""
 
 
-# ---------- Adjuntar archivo robusto ----------
 def _attach_file_robusto(page: Page, file_path: Path) -> None:
     """
     Adjunta archivo evitando el diálogo nativo:
@@ -136,29 +120,31 @@ def _attach_file_robusto(page: Page, file_path: Path) -> None:
     3) file_chooser fallback
     Intenta sincronizar el display #file-name si el frontend no lo hace.
     """
-    file_abs = str(Path(file_path).resolve())
+    file_abs = os.path.abspath(file_path)  # sin resolve(): no hace falta seguir symlinks
     e1 = e2 = e3 = None
 
     # Intento 1: directo
     try:
         _wait(page, SEL_FILE_INPUT, "attached")
         page.set_input_files(SEL_FILE_INPUT, file_abs)
-        logger.info(f"📎 Archivo adjuntado (directo): {file_path.name}")
+        logger.info("📎 Archivo adjuntado (directo): %s", file_path.name)
     except Exception as _e1:
         e1 = _e1
-        logger.debug(f"ℹ️ set_input_files directo no disponible aún: {e1}")
+        logger.debug("ℹ️ set_input_files directo no disponible aún: %s", e1)
 
         # Intento 2: click en label + reintento
         try:
-            if page.query_selector(SEL_UPLOAD_LABEL):
-                page.click(SEL_UPLOAD_LABEL)
+            try:
+                page.click(SEL_UPLOAD_LABEL, timeout=OPTIONAL_WAIT_MS)
                 sleep(0.15)
+            except PlaywrightTimeoutError:
+                pass
             _wait(page, SEL_FILE_INPUT, "attached", timeout=4000)
             page.set_input_files(SEL_FILE_INPUT, file_abs)
-            logger.info(f"📎 Archivo adjuntado (tras click label): {file_path.name}")
+            logger.info("📎 Archivo adjuntado (tras click label): %s", file_path.name)
         except Exception as _e2:
             e2 = _e2
-            logger.debug(f"ℹ️ set_input_files post-label falló: {e2}")
+            logger.debug("ℹ️ set_input_files post-label falló: %s", e2)
 
             # Intento 3: capturar file chooser
             try:
@@ -170,7 +156,7 @@ def _attach_file_robusto(page: Page, file_path: Path) -> None:
                             page.click(SEL_FILE_INPUT)
                 fc = fc_info.value
                 fc.set_files(file_abs)
-                logger.info(f"📎 Archivo adjuntado (file_chooser): {file_path.name}")
+                logger.info("📎 Archivo adjuntado (file_chooser): %s", file_path.name)
             except Exception as _e3:
                 e3 = _e3
                 raise RuntimeError(
@@ -178,22 +164,21 @@ def _attach_file_robusto(page: Page, file_path: Path) -> None:
                     f"Directo='{e1}'\nLabel='{e2}'\nFileChooser='{e3}'"
                 )
 
-    # Confirmación visual (opcional)
+    # Confirmación visual (opcional): el navegador sondea #file-name sin ida y vuelta por intento
     try:
-        if page.query_selector(SEL_FILE_NAME):
-            for _ in range(8):  # más ágil
-                val = page.eval_on_selector(
-                    SEL_FILE_NAME,
-                    "el => el.value || el.getAttribute('value') || el.placeholder || ''"
-                )
-                if isinstance(val, str) and file_path.name in val:
-                    break
-                sleep(0.1)
+        page.wait_for_function(JS_CALL_FILE_NAME_SHOWN, arg=[SEL_FILE_NAME, file_path.name], timeout=800)
     except Exception:
         pass
 
 
 # ---------- Click en el botón correcto 'Iniciar' ----------
+# True cuando existe el botón 'Iniciar' (i.bi-power) habilitado
+JS_POWER_READY = """() => {
+    const btns = Array.from(document.querySelectorAll("button.custom-button"));
+    return btns.some(b => b.querySelector("i.bi.bi-power") && !b.disabled);
+}"""
+
+
 def _click_iniciar(page: Page) -> None:
     """
     Click en el botón 'Iniciar' correcto (i.bi-power), esperando a que se habilite.
@@ -201,14 +186,7 @@ def _click_iniciar(page: Page) -> None:
     """
     # Espera ACTIVA a que exista y esté habilitado
     try:
-        page.wait_for_function(
-            """() => {
-                const btns = Array.from(document.querySelectorAll("button.custom-button"));
-                const match = btns.find(b => b.querySelector("i.bi.bi-power") && !b.disabled);
-                return !!match;
-            }""",
-            timeout=max(800, min(settings.wait_after_upload_ms, 4000))
-        )
+        page.wait_for_function(JS_CALL_POWER_READY, timeout=max(800, min(settings.wait_after_upload_ms, 4000)))
     except PlaywrightTimeoutError:
         pass
 
@@ -233,6 +211,28 @@ def _click_iniciar(page: Page) -> None:
     logger.info("▶️ Click en 'Iniciar' ejecutado en el botón correcto (i.bi-power).")
 
 
+# ---------- Helpers JS inyectados en la página ----------
+# Se registran una vez por página con add_init_script (corren en cada documento
+# nuevo, antes que los scripts de la app); cada llamada solo envía el stub corto.
+JS_PAGE_HELPERS = f"""
+window.__nl_select = {JS_SELECT_OPTION};
+window.__nl_fileNameShown = {JS_FILE_NAME_SHOWN};
+window.__nl_powerReady = {JS_POWER_READY};
+"""
+JS_CALL_SELECT = "(el, args) => window.__nl_select(el, args)"
+JS_CALL_FILE_NAME_SHOWN = "(args) => window.__nl_fileNameShown(args)"
+JS_CALL_POWER_READY = "() => window.__nl_powerReady()"
+
+_pages_with_helpers: "weakref.WeakSet[Page]" = weakref.WeakSet()
+
+
+def _install_page_helpers(page: Page) -> None:
+    """Registra JS_PAGE_HELPERS en la página (una sola vez; toma efecto en la próxima navegación)."""
+    if page not in _pages_with_helpers:
+        page.add_init_script(JS_PAGE_HELPERS)
+        _pages_with_helpers.add(page)
+
+
 # ---------- Flujo principal ----------
 def perform_upload(page: Page, file_path: Path, max_retries: int = 3, timeout: int = 30000) -> None:
     """
@@ -243,24 +243,18 @@ def perform_upload(page: Page, file_path: Path, max_retries: int = 3, timeout: i
       - Adjuntar archivo
       - Click en 'Iniciar'
     """
-    logger.info(f"📤 Subiendo archivo: {file_path.name}")
+    logger.info("📤 Subiendo archivo: %s", file_path.name)
     go_to_analisis(page)
 
     # Parámetro: intenta '30' (Escuchar Reclamos); si no existe, elige la primera opción válida
     try:
-        if page.query_selector(SEL_PARAMETRO):
-            try:
-                _set_select_exact(page, SEL_PARAMETRO, preferred_value="30", preferred_label="Escuchar Reclamos", nombre="Parámetro")
-            except Exception as e:
-                logger.warning(f"⚠️ No se encontró 'Escuchar Reclamos' por value/label, se elegirá la primera opción válida. Detalle: {e}")
-                _set_select_exact(page, SEL_PARAMETRO, preferred_value=None, preferred_label=None, nombre="Parámetro")
+        _set_select_exact(page, SEL_PARAMETRO, preferred_value="30", preferred_label="Escuchar Reclamos", nombre="Parámetro", timeout=OPTIONAL_WAIT_MS)
     except PlaywrightTimeoutError:
         logger.warning("⚠️ Parámetro: no se encontró a tiempo.")
 
     # Servicio (si existe)
     try:
-        if page.query_selector(SEL_SERVICIO):
-            _set_select_exact(page, SEL_SERVICIO, preferred_value=str(settings.default_servicio), preferred_label=str(settings.default_servicio), nombre="Servicio")
+        _set_select_exact(page, SEL_SERVICIO, preferred_value=str(settings.default_servicio), preferred_label=str(settings.default_servicio), nombre="Servicio", timeout=OPTIONAL_WAIT_MS)
     except PlaywrightTimeoutError:
         logger.warning("⚠️ Servicio: no se encontró a tiempo.")
 
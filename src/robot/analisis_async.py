@@ -0,0 +1,161 @@
+"""
+Versión async (playwright.async_api) del flujo de 'Iniciar análisis'.
+Mismos pasos, selectores y JS que src/robot/analisis.py, pero cada espera
+cede el event loop para que otros uploaders avancen mientras tanto.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+from typing import Optional
+import logging
+import weakref
+
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from src.core import settings
+from src.robot.analisis import (
+    SEL_PARAMETRO, SEL_SERVICIO,
+    SEL_UPLOAD_LABEL, SEL_FILE_INPUT, SEL_FILE_NAME,
+    SEL_INICIAR_POWER_BTN_ALL, SEL_INICIAR_POWER_BTN_ENABLED,
+    JS_PAGE_HELPERS, JS_CALL_SELECT, JS_CALL_FILE_NAME_SHOWN, JS_CALL_POWER_READY,
+    OPTIONAL_WAIT_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+_pages_with_helpers: "weakref.WeakSet[Page]" = weakref.WeakSet()
+
+
+async def _wait(page: Page, selector: str, state: str = "visible", timeout: Optional[int] = None):
+    await page.wait_for_selector(selector, state=state, timeout=timeout or settings.browser_timeout)
+
+
+async def _install_page_helpers(page: Page) -> None:
+    """Igual que en la versión sync: registra JS_PAGE_HELPERS una vez por página."""
+    if page not in _pages_with_helpers:
+        await page.add_init_script(JS_PAGE_HELPERS)
+        _pages_with_helpers.add(page)
+
+
+async def go_to_analisis(page: Page) -> None:
+    """
+    Carga /iniciar-analisis con un solo goto y una sola espera (networkidle).
+    Se navega aunque ya se esté en la página: así el formulario queda limpio
+    tras la subida anterior.
+    """
+    await _install_page_helpers(page)
+    await page.goto(settings.analisis_url, wait_until="networkidle", timeout=settings.navigation_timeout)
+
+
+# ---------- Helpers de <select> ----------
+async def _set_select_exact(page: Page, selector: str, preferred_value: Optional[str], preferred_label: Optional[str], nombre: str,
+                            timeout: Optional[int] = None) -> None:
+    await _wait(page, selector, "visible", timeout=timeout)
+    picked = await page.eval_on_selector(selector, JS_CALL_SELECT, {"value": preferred_value, "label": preferred_label})
+
+    if not picked:
+        raise RuntimeError(f"{nombre}: no se encontró una opción válida para seleccionar.")
+    if picked["reason"] == "first-nonempty" and (preferred_value or preferred_label):
+        logger.warning("⚠️ %s: no se encontró '%s', se usa la primera opción válida.", nombre, preferred_label or preferred_value)
+
+    logger.info("✔️ %s: '%s' (value='%s', preferido='%s', modo='%s')",
+                nombre, picked["label"], picked["value"], preferred_value or preferred_label, picked["reason"])
+
+
+# ---------- Adjuntar archivo robusto ----------
+async def _attach_file_robusto(page: Page, file_path: Path) -> None:
+    """Igual que la versión sync: directo → click en label → file_chooser."""
+    file_abs = os.path.abspath(file_path)  # sin resolve(): no hace falta seguir symlinks
+    e1 = e2 = e3 = None
+
+    try:
+        await _wait(page, SEL_FILE_INPUT, "attached")
+        await page.set_input_files(SEL_FILE_INPUT, file_abs)
+        logger.info("📎 Archivo adjuntado (directo): %s", file_path.name)
+    except Exception as _e1:
+        e1 = _e1
+        logger.debug("ℹ️ set_input_files directo no disponible aún: %s", e1)
+
+        try:
+            try:
+                await page.click(SEL_UPLOAD_LABEL, timeout=OPTIONAL_WAIT_MS)
+                await asyncio.sleep(0.15)
+            except PlaywrightTimeoutError:
+                pass
+            await _wait(page, SEL_FILE_INPUT, "attached", timeout=4000)
+            await page.set_input_files(SEL_FILE_INPUT, file_abs)
+            logger.info("📎 Archivo adjuntado (tras click label): %s", file_path.name)
+        except Exception as _e2:
+            e2 = _e2
+            logger.debug("ℹ️ set_input_files post-label falló: %s", e2)
+
+            try:
+                async with page.expect_file_chooser(timeout=4000) as fc_info:
+                    if await page.query_selector(SEL_UPLOAD_LABEL):
+                        await page.click(SEL_UPLOAD_LABEL)
+                    elif await page.query_selector(SEL_FILE_INPUT):
+                        await page.click(SEL_FILE_INPUT)
+                fc = await fc_info.value
+                await fc.set_files(file_abs)
+                logger.info("📎 Archivo adjuntado (file_chooser): %s", file_path.name)
+            except Exception as _e3:
+                e3 = _e3
+                raise RuntimeError(
+                    "No fue posible adjuntar el archivo.\n"
+                    f"Directo='{e1}'\nLabel='{e2}'\nFileChooser='{e3}'"
+                )
+
+    # Confirmación visual (opcional): el navegador sondea #file-name sin ida y vuelta por intento
+    try:
+        await page.wait_for_function(JS_CALL_FILE_NAME_SHOWN, arg=[SEL_FILE_NAME, file_path.name], timeout=800)
+    except Exception:
+        pass
+
+
+# ---------- Click en el botón correcto 'Iniciar' ----------
+async def _click_iniciar(page: Page) -> None:
+    try:
+        await page.wait_for_function(JS_CALL_POWER_READY, timeout=max(800, min(settings.wait_after_upload_ms, 4000)))
+    except PlaywrightTimeoutError:
+        pass
+
+    btn = await page.query_selector(SEL_INICIAR_POWER_BTN_ENABLED)
+    if not btn:
+        any_btn = await page.query_selector(SEL_INICIAR_POWER_BTN_ALL)
+        if any_btn and await any_btn.get_attribute("disabled") is not None:
+            raise RuntimeError("El botón 'Iniciar' (con i.bi-power) sigue deshabilitado. Verifica selección y archivo adjunto.")
+        raise RuntimeError("No se encontró el botón 'Iniciar' correcto (i.bi-power). Revisa los selectores.")
+
+    try:
+        await btn.click()
+    except PlaywrightTimeoutError:
+        await asyncio.sleep(0.1)
+        await btn.click()
+
+    try:
+        await page.wait_for_load_state("networkidle", timeout=max(1200, min(settings.wait_after_submit_ms, 5000)))
+    except PlaywrightTimeoutError:
+        pass
+
+    logger.info("▶️ Click en 'Iniciar' ejecutado en el botón correcto (i.bi-power).")
+
+
+# ---------- Flujo principal ----------
+async def perform_upload_async(page: Page, file_path: Path) -> None:
+    """Mismo flujo que perform_upload: análisis → parámetro → servicio → adjuntar → Iniciar."""
+    logger.info("📤 Subiendo archivo: %s", file_path.name)
+    await go_to_analisis(page)
+
+    try:
+        await _set_select_exact(page, SEL_PARAMETRO, preferred_value="30", preferred_label="Escuchar Reclamos", nombre="Parámetro", timeout=OPTIONAL_WAIT_MS)
+    except PlaywrightTimeoutError:
+        logger.warning("⚠️ Parámetro: no se encontró a tiempo.")
+
+    try:
+        await _set_select_exact(page, SEL_SERVICIO, preferred_value=str(settings.default_servicio), preferred_label=str(settings.default_servicio), nombre="Servicio", timeout=OPTIONAL_WAIT_MS)
+    except PlaywrightTimeoutError:
+        logger.warning("⚠️ Servicio: no se encontró a tiempo.")
+
+    await _attach_file_robusto(page, file_path)
+    await asyncio.sleep(0.1)
+    await _click_iniciar(page)
@@ -3,84 +3,375 @@ Login y manejo de sesión con Playwright.
 Usa los selectores del login: #userName y #password (según tu HTML).
 """
 
+import asyncio
+import json
+import logging
+import stat
+import time
+from contextlib import suppress
 from pathlib import Path
-from playwright.sync_api import Playwright, sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.sync_api import Browser, Playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import Browser as AsyncBrowser, Error as AsyncPlaywrightError, TimeoutError as AsyncPlaywrightTimeoutError
 from src.core import settings
-from src.core.settings import has_placeholder  # función auxiliar de settings
+from src.robot.browser_control import get_browser_pool, stop_playwright
+
+logger = logging.getLogger(__name__)
 
 # Selectores del login
 SEL_USERNAME = "#userName"
 SEL_PASSWORD = "#password"
 SEL_SUBMIT   = "button[type='submit'], button.custom-button"
+# Enlaces del menú que solo existen con sesión iniciada
+SEL_LOGGED_IN = "a[href='iniciar-analisis'], a[href='configuracion']"
+
+# Espera por MutationObserver: resuelve en cuanto el nodo aparece (sin el polling
+# de wait_for_selector); devuelve false al agotar el tiempo. No ve shadow DOM.
+JS_WAIT_SELECTOR = """([sel, t]) => new Promise((res) => {
+  if (document.querySelector(sel)) return res(true);
+  const mo = new MutationObserver(() => {
+    if (document.querySelector(sel)) { mo.disconnect(); clearTimeout(timer); res(true); }
+  });
+  const timer = setTimeout(() => { mo.disconnect(); res(false); }, t);
+  mo.observe(document, {childList: true, subtree: true, attributes: true});
+})"""
 
 
-def _first_selector_that_exists(page, candidates: str) -> str | None:
-    if not candidates:
+def _context_kwargs(storage_path: Path, force_relogin: bool) -> dict:
+    """Opciones de contexto comunes (sync/async): viewport, user agent y storage_state si aplica."""
+    context_kwargs = {
+        "viewport": {"width": settings.browser_viewport_width, "height": settings.browser_viewport_height},
+        "user_agent": settings.browser_user_agent,
+    }
+    state = None if force_relogin else _load_storage_state(storage_path)
+    if state is not None:
+        # Se pasa ya parseado: Playwright no vuelve a abrir el archivo
+        context_kwargs["storage_state"] = state
+    return context_kwargs
+
+
+# storage_state ya parseado: ruta -> (mtime_ns, dict)
+_storage_cache: dict = {}
+
+
+def _load_storage_state(storage_path: Path) -> dict | None:
+    """storage_state como dict (un stat; se relee solo si cambió el mtime) o None si no hay archivo válido."""
+    try:
+        st = storage_path.stat()
+    except OSError:
         return None
-    for sel in [c.strip() for c in candidates.split(",")]:
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    cached = _storage_cache.get(storage_path)
+    if cached and cached[0] == st.st_mtime_ns:
+        return cached[1]
+    try:
+        state = json.loads(storage_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    _storage_cache[storage_path] = (st.st_mtime_ns, state)
+    return state
+
+
+def _remember_storage_state(storage_path: Path, state: dict) -> None:
+    """Guarda en caché el storage_state recién escrito (el siguiente login no lo relee)."""
+    with suppress(OSError):
+        _storage_cache[storage_path] = (storage_path.stat().st_mtime_ns, state)
+
+
+# Recursos que el formulario de login no necesita (settings.login_fast_mode)
+_LOGIN_BLOCKED_RESOURCES = frozenset({"image", "media", "font"})
+
+
+def _block_heavy_resources(route) -> None:
+    if route.request.resource_type in _LOGIN_BLOCKED_RESOURCES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+async def _block_heavy_resources_async(route) -> None:
+    if route.request.resource_type in _LOGIN_BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def wait_selector_fast(page, selector: str, timeout_ms: int) -> bool:
+    """
+    Espera a que `selector` exista en el DOM (True) o a que pase `timeout_ms` (False).
+    Si la página navega durante la espera (submit con recarga) se destruye el
+    contexto JS: entonces se cae a wait_for_selector con el mismo límite.
+    """
+    try:
+        return bool(page.evaluate(JS_WAIT_SELECTOR, [selector, timeout_ms]))
+    except PlaywrightError:
+        try:
+            page.wait_for_selector(selector, state="attached", timeout=timeout_ms)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+
+
+async def wait_selector_fast_async(page, selector: str, timeout_ms: int) -> bool:
+    """Versión async de wait_selector_fast."""
+    try:
+        return bool(await page.evaluate(JS_WAIT_SELECTOR, [selector, timeout_ms]))
+    except AsyncPlaywrightError:
         try:
-            if page.query_selector(sel):
-                return sel
-        except Exception:
-            pass
-    return None
+            await page.wait_for_selector(selector, state="attached", timeout=timeout_ms)
+            return True
+        except AsyncPlaywrightTimeoutError:
+            return False
+
+
+def _session_meta_path(storage_path: Path) -> Path:
+    return storage_path.with_suffix(".meta.json")
+
+
+def _session_is_fresh(storage_path: Path, force_relogin: bool) -> bool:
+    """True si el storage_state se guardó hace menos de su TTL (no hace falta pasar por el login)."""
+    if force_relogin or _load_storage_state(storage_path) is None:
+        return False
+    try:
+        meta = json.loads(_session_meta_path(storage_path).read_text(encoding="utf-8"))
+        return time.time() - float(meta["saved_at"]) < float(meta["ttl"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+def _checked_credentials() -> tuple[str, str]:
+    """(usuario, contraseña); falla antes de abrir contexto si no hay ninguno configurado."""
+    user, pwd = settings.username or "", settings.password or ""
+    if not user and not pwd:
+        raise RuntimeError("Credenciales no configuradas. Revisa APP_USERNAME/APP_PASSWORD en tu .env o config.json.")
+    return user, pwd
+
+
+# Carpetas de storage_state ya creadas (un mkdir por proceso, no por login)
+_storage_dirs_ready: set = set()
+
 
+def _ensure_storage_dir(storage_path: Path) -> None:
+    parent = storage_path.parent
+    if parent not in _storage_dirs_ready:
+        parent.mkdir(parents=True, exist_ok=True)
+        _storage_dirs_ready.add(parent)
 
-def ensure_login(pw: Playwright, force: bool | None = None):
+
+def _mark_session_saved(storage_path: Path) -> None:
+    """Anota junto al storage_state cuándo se guardó y cuánto dura (best-effort)."""
+    meta = {"saved_at": time.time(), "ttl": settings.session_ttl_seconds}
+    with suppress(OSError):
+        _session_meta_path(storage_path).write_text(json.dumps(meta), encoding="utf-8")
+
+
+# Chromium compartido por el proceso (la API sync es de un solo hilo): se toma
+# prestado de BrowserPool, que tiene lista la reserva si éste se cae
+_SHARED_BROWSER = {"browser": None}
+
+
+def _get_browser() -> Browser:
+    """Devuelve el Chromium del proceso; lo pide al pool la primera vez (o si se cerró/cayó)."""
+    browser = _SHARED_BROWSER["browser"]
+    if browser is not None and browser.is_connected():
+        return browser
+    pool = get_browser_pool()
+    if browser is not None:
+        # Solo este navegador (p.ej. cerrado por close_session): libera su plaza;
+        # Playwright sigue vivo y con él la reserva ya lanzada del pool
+        _SHARED_BROWSER["browser"] = None
+        with suppress(Exception):
+            browser.close()
+        pool.release(browser)
+    try:
+        browser = pool.acquire()
+    except Exception:
+        # Lanzar falló: el driver de Playwright pudo caerse, se reinicia en el próximo intento
+        shutdown_browser()
+        raise
+    _SHARED_BROWSER["browser"] = browser
+    return browser
+
+
+def shutdown_browser() -> None:
+    """Cierra el Chromium compartido y el pool, y detiene Playwright (idempotente)."""
+    browser, _SHARED_BROWSER["browser"] = _SHARED_BROWSER["browser"], None
+    if browser is not None:
+        with suppress(Exception):
+            browser.close()
+    stop_playwright()
+
+
+def ensure_login(pw: Playwright | None = None, force: bool | None = None, browser: Browser | None = None):
     """
-    Lanza Chromium, reutiliza storage_state si existe y no se fuerza relogin.
-    Hace login si es necesario y guarda storage_state.
+    Abre un contexto nuevo sobre `browser`, sobre un Chromium propio si se pasa
+    `pw`, o sobre uno prestado por BrowserPool (devolverlo con close_login).
+    Usa storage_state si existe y no se fuerza relogin; hace login si es
+    necesario y guarda storage_state.
     Devuelve (browser, context, page).
     """
-    headless = settings.browser_headless
     force_relogin = settings.force_relogin if force is None else bool(force)
-    storage_path: Path = settings.storage_state_path
+    fresh = _session_is_fresh(settings.storage_state_path, force_relogin)
+    if not fresh:
+        _checked_credentials()  # sin credenciales se falla antes de lanzar/pedir Chromium
+    pooled = browser is None and pw is None
+    own = browser is None and pw is not None  # Chromium propio: se cierra si el login falla
+    if browser is None:
+        browser = get_browser_pool().acquire() if pooled else pw.chromium.launch(headless=settings.browser_headless)
+    try:
+        if fresh:
+            # Sesión guardada aún vigente: sin navegación al login
+            context = browser.new_context(**_context_kwargs(settings.storage_state_path, False))
+            return browser, context, context.new_page()
+        context, page = _login_new_context(browser, force)
+        return browser, context, page
+    except Exception:
+        if pooled:
+            get_browser_pool().release(browser)
+        elif own:
+            with suppress(Exception):
+                browser.close()
+        raise
 
-    browser = pw.chromium.launch(headless=headless)
-    context_kwargs = {
-        "viewport": {"width": settings.browser_viewport_width, "height": settings.browser_viewport_height},
-        "user_agent": settings.browser_user_agent,
-    }
 
-    if storage_path.exists() and not force_relogin:
-        context_kwargs["storage_state"] = str(storage_path)
+def close_login(browser: Browser, context) -> None:
+    """Cierra el contexto de ensure_login y devuelve el navegador al pool."""
+    with suppress(Exception):
+        context.close()
+    get_browser_pool().release(browser)
 
-    context = browser.new_context(**context_kwargs)
-    page = context.new_page()
 
-    # Ir a login
-    login_url = settings.login_url
-    if not isinstance(login_url, str) or has_placeholder(login_url) or not login_url.startswith(("http://", "https://")):
-        raise RuntimeError(f"URL de login inválida: {login_url}. Revisa BASE_URL/LOGIN_URL en tu .env o config.json.")
+def login_context(browser: Browser, force: bool | None = None):
+    """
+    Versión sync de login_context_async: contexto nuevo sobre un navegador ya
+    lanzado (sin relanzar Chromium), login y página en 'Iniciar análisis'.
+    Si el storage_state sigue vigente (TTL) se entra directo a la app; si aun así
+    redirige al login, se rehace el login forzado.
+    Devuelve (context, page).
+    """
+    force_relogin = settings.force_relogin if force is None else bool(force)
+    storage_path: Path = settings.storage_state_path
+    if _session_is_fresh(storage_path, force_relogin):
+        context = browser.new_context(**_context_kwargs(storage_path, False))
+        page = context.new_page()
+        page.goto(settings.analisis_url, wait_until="domcontentloaded", timeout=settings.navigation_timeout)
+        if "/login" not in (page.url or "").lower():
+            return context, page
+        logger.info("🔑 La sesión guardada ya no es válida; se rehace el login.")
+        context.close()
+        force = True
+    context, page = _login_new_context(browser, force)
+    # Si el submit ya redirigió a 'Iniciar análisis' no se navega otra vez
+    if not (page.url or "").startswith(settings.analisis_url):
+        page.goto(settings.analisis_url, wait_until="domcontentloaded", timeout=settings.navigation_timeout)
+    return context, page
 
-    page.goto(login_url, wait_until="domcontentloaded", timeout=settings.navigation_timeout)
 
-    # Llenar login
-    page.fill(SEL_USERNAME, settings.username or "")
-    page.fill(SEL_PASSWORD, settings.password or "")
+def _login_new_context(browser: Browser, force: bool | None):
+    # Settings resueltos de una vez (snapshot) y leídos en locales
+    s = settings.snapshot()
+    force_relogin = s.force_relogin if force is None else bool(force)
+    storage_path: Path = s.storage_state_path
+    nav_timeout, login_timeout = s.navigation_timeout, s.login_timeout_ms
+    user, pwd = _checked_credentials()
+    fast_mode = s.login_fast_mode
 
-    submit_sel = _first_selector_that_exists(page, SEL_SUBMIT)
-    if not submit_sel:
-        raise RuntimeError("No se encontró el botón de submit del login.")
+    context = browser.new_context(**_context_kwargs(storage_path, force_relogin))
+    if fast_mode:
+        context.route("**/*", _block_heavy_resources)
+    page = context.new_page()
 
-    page.click(submit_sel)
+    # Ir a login (URL ya validada por settings al cargar)
+    page.goto(s.login_url, wait_until="domcontentloaded", timeout=nav_timeout)
 
-    # Verificar login
+    # Llenar login y enviar (el locator espera al botón: sin consulta previa)
+    # Un campo vacío no se toca (fill("") sería otro viaje al navegador)
+    if user:
+        page.locator(SEL_USERNAME).fill(user)
+    if pwd:
+        page.locator(SEL_PASSWORD).fill(pwd)
     try:
-        page.wait_for_load_state("networkidle", timeout=settings.login_timeout_ms)
+        page.locator(SEL_SUBMIT).first.click(timeout=nav_timeout)
     except PlaywrightTimeoutError:
-        pass
+        context.close()
+        raise RuntimeError("No se encontró el botón de submit del login.")
+
+    # Verificar login: basta con que aparezca el menú de la app (no se espera networkidle)
+    if not wait_selector_fast(page, SEL_LOGGED_IN, login_timeout):
+        logger.warning("⚠️ No apareció el menú tras el login (url=%s); se continúa igualmente.", page.url)
+    if fast_mode:
+        # Las páginas de la app se cargan completas
+        context.unroute("**/*", _block_heavy_resources)
 
     # Guardar storage_state
-    storage_path.parent.mkdir(parents=True, exist_ok=True)
-    context.storage_state(path=str(storage_path))
-    return browser, context, page
-
-
-def demo_login():
-    """Ejemplo de uso: abre sesión y devuelve (pw, browser, context, page)."""
-    pw = sync_playwright().start()
-    browser, context, page = ensure_login(pw)
-    # Navegar directamente a iniciar-analisis
-    page.goto(settings.analisis_url, wait_until="domcontentloaded", timeout=settings.navigation_timeout)
-    return pw, browser, context, page
+    _ensure_storage_dir(storage_path)
+    _remember_storage_state(storage_path, context.storage_state(path=str(storage_path)))
+    _mark_session_saved(storage_path)
+    return context, page
+
+
+def demo_login(force: bool | None = None):
+    """
+    Abre sesión sobre el Chromium compartido y devuelve (pw, browser, context, page).
+    pw es None: Playwright lo detiene shutdown_browser(). Cerrar el browser
+    (close_session) solo hace que el siguiente login vuelva a lanzar Chromium.
+    """
+    force_relogin = settings.force_relogin if force is None else bool(force)
+    if not _session_is_fresh(settings.storage_state_path, force_relogin):
+        _checked_credentials()  # sin credenciales se falla antes de lanzar Chromium
+    browser = _get_browser()
+    context, page = login_context(browser, force)
+    return None, browser, context, page
+
+
+# ---------- API async (settings.async_uploads) ----------
+async def login_context_async(browser: AsyncBrowser, force: bool | None = None):
+    """
+    Versión async de ensure_login sobre un navegador ya lanzado:
+    abre un contexto propio, hace login, guarda storage_state y deja la
+    página en 'Iniciar análisis'. Devuelve (context, page).
+    """
+    s = settings.snapshot()
+    force_relogin = s.force_relogin if force is None else bool(force)
+    storage_path: Path = s.storage_state_path
+    analisis_url, nav_timeout = s.analisis_url, s.navigation_timeout
+
+    if _session_is_fresh(storage_path, force_relogin):
+        context = await browser.new_context(**_context_kwargs(storage_path, False))
+        page = await context.new_page()
+        await page.goto(analisis_url, wait_until="domcontentloaded", timeout=nav_timeout)
+        if "/login" not in (page.url or "").lower():
+            return context, page
+        logger.info("🔑 La sesión guardada ya no es válida; se rehace el login.")
+        await context.close()
+        force_relogin = True
+
+    user, pwd = _checked_credentials()
+    context = await browser.new_context(**_context_kwargs(storage_path, force_relogin))
+    if s.login_fast_mode:
+        await context.route("**/*", _block_heavy_resources_async)
+    page = await context.new_page()
+
+    await page.goto(s.login_url, wait_until="domcontentloaded", timeout=nav_timeout)
+    # Campos independientes: los fill van en paralelo (un campo vacío no se toca)
+    await asyncio.gather(*(
+        page.locator(sel).fill(value)
+        for sel, value in ((SEL_USERNAME, user), (SEL_PASSWORD, pwd))
+        if value
+    ))
+    try:
+        await page.locator(SEL_SUBMIT).first.click(timeout=nav_timeout)
+    except AsyncPlaywrightTimeoutError:
+        await context.close()
+        raise RuntimeError("No se encontró el botón de submit del login.")
+    if not await wait_selector_fast_async(page, SEL_LOGGED_IN, s.login_timeout_ms):
+        logger.warning("⚠️ No apareció el menú tras el login (url=%s); se continúa igualmente.", page.url)
+    if s.login_fast_mode:
+        await context.unroute("**/*", _block_heavy_resources_async)
+
+    _ensure_storage_dir(storage_path)
+    _remember_storage_state(storage_path, await context.storage_state(path=str(storage_path)))
+    _mark_session_saved(storage_path)
+    if not (page.url or "").startswith(analisis_url):
+        await page.goto(analisis_url, wait_until="domcontentloaded", timeout=nav_timeout)
+    return context, page
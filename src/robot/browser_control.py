@@ -0,0 +1,147 @@
+"""
+Playwright del proceso y pool de navegadores Chromium pre-lanzados.
+Lanzar Chromium cuesta segundos; abrir un contexto nuevo es casi gratis. El pool
+mantiene hasta `settings.browser_pool_size` navegadores vivos y cada sesión
+lógica abre su propio contexto sobre el que recibe: el Chromium compartido de
+src.robot.auth sale de aquí (runner.serve lo pre-lanza con warm()) y, si se cae,
+lo sustituye la reserva ya lanzada sin esperar a un arranque en frío.
+
+Todos los navegadores (el compartido de src.robot.auth y los del pool) salen de
+un único Playwright, que solo se detiene con stop_playwright(). La API sync está
+ligada al hilo que la arrancó, así que el pool se usa desde ese hilo (o uno por
+proceso, como los workers de runner). El lock solo protege la contabilidad.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+from contextlib import suppress
+from typing import Optional
+
+from playwright.sync_api import Browser, Playwright, sync_playwright
+
+from src.core import settings
+
+logger = logging.getLogger(__name__)
+
+# Playwright del proceso (se arranca con el primer navegador)
+_playwright: Optional[Playwright] = None
+
+
+def get_playwright() -> Playwright:
+    """Playwright del proceso (se arranca la primera vez)."""
+    global _playwright
+    if _playwright is None:
+        _playwright = sync_playwright().start()
+    return _playwright
+
+
+def launch_browser() -> Browser:
+    """Lanza un Chromium más sobre el Playwright del proceso."""
+    return get_playwright().chromium.launch(headless=settings.browser_headless)
+
+
+def stop_playwright() -> None:
+    """Cierra el pool y detiene Playwright: cae cualquier navegador aún abierto (idempotente)."""
+    global _playwright
+    shutdown_browser_pool()
+    pw, _playwright = _playwright, None
+    if pw is not None:
+        with suppress(Exception):
+            pw.stop()
+
+
+class BrowserPool:
+    """Navegadores reutilizables: acquire() entrega uno libre (o lanza otro), release() lo devuelve."""
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = max(1, int(size or settings.browser_pool_size))
+        # LIFO: se reutiliza primero el navegador usado más recientemente
+        self._idle: "queue.LifoQueue[Browser]" = queue.LifoQueue()
+        self._launched = 0
+        self._lock = threading.Lock()
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """Pre-lanza navegadores hasta `count` (por defecto, el tamaño del pool)."""
+        target = self.size if count is None else min(self.size, count)
+        while self._reserve(target):
+            self.release(self._launch())
+        logger.info("🌐 Pool de navegadores listo (%s/%s)", self._launched, self.size)
+
+    def acquire(self, timeout: Optional[float] = None) -> Browser:
+        """
+        Devuelve un navegador vivo: uno libre, uno nuevo si no se llegó al máximo,
+        o espera a que otro se libere. RuntimeError si se agota `timeout`.
+        """
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                if self._reserve(self.size):
+                    return self._launch()
+                try:
+                    browser = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise RuntimeError(f"No hay navegadores libres en el pool tras {timeout}s.")
+            if browser.is_connected():
+                return browser
+            self._forget()  # se cayó mientras estaba libre: deja sitio a uno nuevo
+
+    def release(self, browser: Browser) -> None:
+        """Devuelve el navegador al pool (uno caído solo libera su plaza)."""
+        if browser.is_connected():
+            self._idle.put(browser)
+        else:
+            self._forget()
+
+    def shutdown(self) -> None:
+        """Cierra los navegadores libres (idempotente)."""
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with suppress(Exception):
+                browser.close()
+            self._forget()
+
+    def _reserve(self, limit: int) -> bool:
+        """Reserva la plaza de un navegador nuevo si hay menos de `limit`."""
+        with self._lock:
+            if self._launched >= limit:
+                return False
+            self._launched += 1
+            return True
+
+    def _launch(self) -> Browser:
+        """Lanza el navegador de una plaza ya reservada (la libera si falla)."""
+        try:
+            return launch_browser()
+        except Exception:
+            self._forget()
+            raise
+
+    def _forget(self) -> None:
+        with self._lock:
+            self._launched = max(0, self._launched - 1)
+
+
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Pool único del proceso; se cierra solo al salir."""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+        atexit.register(shutdown_browser_pool)
+    return _pool
+
+
+def shutdown_browser_pool() -> None:
+    """Cierra los navegadores del pool del proceso."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
@@ -0,0 +1,22 @@
+"""
+Fixtures compartidas de los tests (una sola carga de config/settings por sesión)
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def config():
+    from src.core import config as loaded_config
+    return loaded_config
+
+
+@pytest.fixture(scope="session")
+def settings():
+    from src.core import settings as loaded_settings
+    return loaded_settings
+
+
+@pytest.fixture(scope="session")
+def snapshot(settings):
+    return settings.snapshot()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test del pool de navegadores (sin Chromium: launch_browser simulado)
+"""
+
+import pytest
+
+from src.robot import auth, browser_control
+from src.robot.browser_control import BrowserPool
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def close(self):
+        self.connected = False
+
+    def new_context(self, **kwargs):
+        return FakeContext()
+
+
+class FakeContext:
+    closed = False
+
+    def new_page(self):
+        return object()
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def launched(monkeypatch):
+    """Navegadores simulados que va lanzando el pool."""
+    browsers = []
+
+    def fake_launch():
+        browsers.append(FakeBrowser())
+        return browsers[-1]
+
+    monkeypatch.setattr(browser_control, "launch_browser", fake_launch)
+    return browsers
+
+
+def test_pool_acquire_release(launched):
+    pool = BrowserPool(size=2)
+    a, b = pool.acquire(), pool.acquire()
+    assert a is not b and len(launched) == 2
+
+    # Lleno: sin navegadores libres se agota la espera
+    with pytest.raises(RuntimeError):
+        pool.acquire(timeout=0.01)
+
+    # Al devolverlo se reutiliza el mismo, sin lanzar otro
+    pool.release(a)
+    assert pool.acquire() is a
+    assert len(launched) == 2
+
+
+def test_pool_dead_browser_frees_slot(launched):
+    pool = BrowserPool(size=1)
+    a = pool.acquire()
+    a.close()
+    pool.release(a)
+    assert pool._launched == 0
+
+    b = pool.acquire()
+    assert b is not a and b.is_connected()
+    assert pool._launched == 1
+
+
+def test_pool_warm_and_shutdown(launched):
+    pool = BrowserPool(size=3)
+    pool.warm(2)
+    assert pool._launched == 2 and pool._idle.qsize() == 2
+
+    pool.shutdown()
+    assert pool._launched == 0
+    assert not any(b.is_connected() for b in launched)
+
+
+def test_ensure_login_borrows_from_pool(launched, monkeypatch):
+    pool = BrowserPool(size=1)
+    monkeypatch.setattr(browser_control, "_pool", pool)
+    monkeypatch.setattr(auth, "_login_new_context", lambda browser, force: (FakeContext(), object()))
+
+    browser, context, _ = auth.ensure_login(force=True)
+    assert browser is launched[0] and pool._idle.qsize() == 0
+
+    auth.close_login(browser, context)
+    assert context.closed and pool._idle.qsize() == 1
+    assert pool._launched == 1
+
+
+def test_shared_browser_replaced_by_warm_spare(launched, monkeypatch):
+    pool = BrowserPool(size=2)
+    monkeypatch.setattr(browser_control, "_pool", pool)
+    monkeypatch.setitem(auth._SHARED_BROWSER, "browser", None)
+    pool.warm()
+
+    shared = auth._get_browser()
+    assert auth._get_browser() is shared and len(launched) == 2
+
+    # Se cae: la reserva ya lanzada lo sustituye sin lanzar otro Chromium
+    shared.close()
+    spare = auth._get_browser()
+    assert spare is not shared and spare.is_connected()
+    assert len(launched) == 2 and pool._launched == 1
+
+
+def test_ensure_login_closes_own_browser_on_failure(monkeypatch):
+    own = FakeBrowser()
+
+    class FakePlaywright:
+        class chromium:
+            @staticmethod
+            def launch(headless):
+                return own
+
+    def failing_login(browser, force):
+        raise RuntimeError("login falló")
+
+    monkeypatch.setattr(auth, "_login_new_context", failing_login)
+    with pytest.raises(RuntimeError):
+        auth.ensure_login(FakePlaywright(), force=True)
+    assert not own.is_connected()
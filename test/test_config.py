@@ -3,52 +3,22 @@
 Test del ConfigLoader
 """
 
-import sys
-from pathlib import Path
+import pytest
 
-# Añadir src al path
-sys.path.append(str(Path(__file__).parent / 'src'))
 
-from src.core import config
+@pytest.mark.parametrize("key, expected", [
+    ('urls.base_url', 'http://192.168.100.166:5002'),
+    ('browser.headless', False),
+    # Placeholder completo '{{VAR}}': el loader devuelve el valor ya tipado
+    ('analisis.default_parametro', 1),
+    ('paths.shared_folder', '\\\\192.168.100.39\\callcenter Guatemala\\Speech_Anality\\Speech'),
+])
+def test_config_value(config, key, expected):
+    """Valores básicos de config.json (con las variables de .env resueltas)"""
+    assert config.get(key) == expected
 
-def test_config_loader():
-    """Probar que el ConfigLoader funciona correctamente"""
-    print("🧪 Testing ConfigLoader...")
-    
-    # Test de valores básicos
-    tests = [
-        ('urls.base_url', 'http://192.168.100.166:5002'),
-        ('browser.headless', False),
-        ('analisis.default_parametro', '1'),
-        ('paths.shared_folder', 'C:/Users/aj.montalvo/Desktop/Carpeta_Compartida')
-    ]
-    
-    all_passed = True
-    
-    for key, expected_value in tests:
-        actual_value = config.get(key)
-        status = "✅" if actual_value == expected_value else "❌"
-        print(f"{status} {key}: {actual_value} (expected: {expected_value})")
-        
-        if actual_value != expected_value:
-            all_passed = False
-    
-    # Test de valores desde .env
-    env_tests = ['credentials.username', 'credentials.password']
-    for key in env_tests:
-        value = config.get(key)
-        status = "✅" if value else "❌"
-        print(f"{status} {key}: {'***' if value else 'NOT SET'}")
-        
-        if not value:
-            all_passed = False
-    
-    if all_passed:
-        print("🎉 ¡Todos los tests pasaron!")
-    else:
-        print("❌ Algunos tests fallaron")
-    
-    return all_passed
 
-if __name__ == "__main__":
-    test_config_loader()
\ No newline at end of file
+@pytest.mark.parametrize("key", ['credentials.username', 'credentials.password'])
+def test_config_credentials(config, key):
+    """Credenciales definidas desde .env"""
+    assert config.get(key)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test del registro de procesados (idempotencia)
+"""
+
+import shelve
+import time
+
+from src.event import processed_registry
+from src.event.processed_registry import ProcessedRegistry
+
+
+def test_key_for_changes_with_content(tmp_path):
+    f = tmp_path / "data.xlsx"
+    f.write_bytes(b"uno")
+    key = ProcessedRegistry.key_for(f)
+    assert key == ProcessedRegistry.key_for(f, f.stat())
+
+    f.write_bytes(b"uno mas largo")
+    assert ProcessedRegistry.key_for(f) != key
+
+
+def test_persists_across_reopen(tmp_path):
+    db = tmp_path / "reg" / "processed"
+    reg = ProcessedRegistry(db, sync_every=1)
+    reg.add("a|1|1")
+    assert "a|1|1" in reg
+    reg.close()
+
+    reopened = ProcessedRegistry(db)
+    assert "a|1|1" in reopened
+    assert "b|1|1" not in reopened
+    reopened.close()
+
+
+def test_expires_old_entries_on_open(tmp_path):
+    db = tmp_path / "processed"
+    with shelve.open(str(db)) as raw:
+        raw["viejo|1|1"] = time.time() - 2 * 86400
+        raw["nuevo|1|1"] = time.time()
+
+    reg = ProcessedRegistry(db, ttl_days=1)
+    assert "viejo|1|1" not in reg
+    assert "nuevo|1|1" in reg
+    reg.close()
+
+    # La expiración también se persiste
+    with shelve.open(str(db)) as raw:
+        assert "viejo|1|1" not in raw
+
+
+def test_memory_fallback_when_shelve_fails(tmp_path, monkeypatch):
+    def broken_open(*args, **kwargs):
+        raise OSError("disco no disponible")
+
+    monkeypatch.setattr(processed_registry.shelve, "open", broken_open)
+    reg = ProcessedRegistry(tmp_path / "processed")
+    assert reg._db is None
+
+    reg.add("a|1|1")
+    assert "a|1|1" in reg
+    reg.close()